@@ -1,32 +1,445 @@
+import asyncio
+import hashlib
 import requests
 import re
 import json
+import threading
 import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field as dataclass_field
+from contextlib import asynccontextmanager
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
+from string import Template
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+import httpx
 import openai
+import orjson
 import html
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+# Erreurs OpenAI transitoires pour lesquelles on relance l'appel
+RETRYABLE_OPENAI_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)
+
+class TruncatedResponseError(RuntimeError):
+    """Réponse du modèle coupée par max_tokens (finish_reason == "length")"""
+
+# Nombre de requêtes PrestaShop de détail lancées en parallèle
+FETCH_WORKERS = 16
+
+# Taille des pages pour la récupération complète (display=full)
+FULL_PAGE_SIZE = 500
+
+# Nombre maximal de réécritures conservées dans le cache (les plus anciennes sont évincées)
+REWRITE_CACHE_SIZE = 2048
+
+# Balises de mise en forme simple : le texte seul est envoyé au modèle
+_PLAIN_TAGS = frozenset(('html', 'head', 'body', 'p', 'br', 'span', 'div'))
+
+# Statuts d'un batch OpenAI après lesquels il n'évoluera plus
+BATCH_FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+# Expressions régulières compilées une seule fois au chargement du module
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_FENCE_RE = re.compile(r'```[\w]*\n?|\n?```')
+_PRICE_RE = re.compile(r'(Prix\s*:\s*[\d,]+\s*€\s*\|\s*)')
+
+# Mots-clés SEO comptés en un seul passage : groupe nommé -> libellé affiché
+_KEYWORD_LABELS = {
+    'eliquide': 'e-liquide',
+    'vapotage': 'vapotage',
+    'cigelec': 'cigarette électronique',
+    'vape': 'vape',
+    'nicotine': 'nicotine'
+}
+_ALL_KEYWORDS_RE = re.compile(
+    r'(?P<eliquide>e-liquide)|(?P<vapotage>vapotage)|(?P<cigelec>cigarette\s+électronique)'
+    r'|(?P<vape>vape)|(?P<nicotine>nicotine)',
+    re.IGNORECASE
+)
+
+# Blocs communs aux prompts
+_PROMPT_INTRO = "Tu es un expert SEO ET un spécialiste de la conformité réglementaire pour les produits de vapotage."
+
+_LEGAL_CONTEXT = """CONTEXTE LÉGAL FIVAPE (Avril 2024) :
+- Directive européenne 2014/40/UE et Code de la Santé Publique
+- Interdiction TOTALE des termes promotionnels et subjectifs
+- Uniquement des informations factuelles et techniques"""
+
+# Instructions spéciales du prompt
+_BRAND_INSTRUCTION = """
+IMPORTANT : Si le texte contient "Le Vapoteur Discount" - CONSERVE EXACTEMENT cette mention avec cette orthographe."""
+
+_PRICE_INSTRUCTION = """
+TRÈS IMPORTANT : Le texte commence par "$price_prefix" - NE PAS l'inclure dans ta réécriture, je l'ajouterai moi-même."""
+
+_HTML_INSTRUCTION = """
+IMPORTANT : Le contenu est en HTML - CONSERVE EXACTEMENT les images, les liens et les listes (balises et attributs), ne réécris que le texte."""
+
+@lru_cache(maxsize=64)
+def _prompt_skeleton(field_type: str, item_type: str, target_length: str,
+                     has_brand: bool, has_price: bool, has_html: bool = False) -> Template:
+    """
+    Partie invariante du prompt de réécriture : seuls le nom de l'élément,
+    le contenu et le prix sont injectés à chaque appel
+    """
+    brand_instruction = _BRAND_INSTRUCTION if has_brand else ""
+    price_instruction = _PRICE_INSTRUCTION if has_price else ""
+    html_instruction = _HTML_INSTRUCTION if has_html else ""
+    
+    return Template(f"""{_PROMPT_INTRO}
+
+{_LEGAL_CONTEXT}
+
+PRODUIT : $item_name
+TYPE : {item_type}
+CHAMP : {field_type}
+LONGUEUR CIBLE : {target_length}
+
+CONTENU À RÉÉCRIRE (sans le prix si présent) :
+$content
+
+{brand_instruction}
+{price_instruction}
+{html_instruction}
+
+MISSION : Réécrire ce contenu en respectant STRICTEMENT :
+
+1. SUPPRIMER tous les termes de ce type : délicieux, savoureux, gourmand, excellent, parfait, bonheur, plaisir, intense, etc.
+2. GARDER uniquement les informations factuelles
+3. Si c'est une Meta Description, rester TRÈS concis ({target_length})
+4. Si c'est un Meta titre, être court et percutant ({target_length})
+5. Préserver les informations techniques : compatibilité, résistances, formats
+
+Fournis UNIQUEMENT le texte réécrit, sans le prix, sans commentaires.""")
+
+def _item_prompt(item_name: str, item_type: str, contexts: Dict[str, Dict]) -> str:
+    """
+    Prompt unique réécrivant plusieurs champs d'un même élément,
+    la réponse attendue étant un objet JSON indexé par clé de champ
+    """
+    entries = []
+    for number, (field, context) in enumerate(contexts.items(), 1):
+        brand_instruction = _BRAND_INSTRUCTION if context['has_vapoteur_discount'] else ""
+        price_instruction = (
+            Template(_PRICE_INSTRUCTION).substitute(price_prefix=context['price_prefix'])
+            if context['price_prefix'] else ""
+        )
+        html_instruction = _HTML_INSTRUCTION if context['has_html'] else ""
+        entries.append(f"""{number}. CLÉ : "{field}"
+CHAMP : {context['field_type']}
+LONGUEUR CIBLE : {context['target_length']}{brand_instruction}{price_instruction}{html_instruction}
+CONTENU À RÉÉCRIRE (sans le prix si présent) :
+{context['content']}""")
+    
+    fields_block = "\n\n".join(entries)
+    keys = ", ".join(f'"{field}"' for field in contexts)
+    
+    return f"""{_PROMPT_INTRO}
+
+{_LEGAL_CONTEXT}
+
+PRODUIT : {item_name}
+TYPE : {item_type}
+
+CHAMPS À RÉÉCRIRE :
+
+{fields_block}
+
+MISSION : Réécrire chaque champ en respectant STRICTEMENT :
+
+1. SUPPRIMER tous les termes de ce type : délicieux, savoureux, gourmand, excellent, parfait, bonheur, plaisir, intense, etc.
+2. GARDER uniquement les informations factuelles
+3. Respecter la LONGUEUR CIBLE de chaque champ (Meta description et Meta titre TRÈS concis)
+4. Préserver les informations techniques : compatibilité, résistances, formats
+
+Réponds UNIQUEMENT avec un objet JSON ayant pour clés {keys} et pour valeurs les textes réécrits, sans le prix, sans commentaires."""
+
+# Plafond de tokens générés selon le type de champ (un Meta titre tient en ~20 tokens)
+_MAX_TOKENS = {
+    'Meta titre': 40,
+    'Balise titre': 40,
+    'Meta description': 100,
+    'Description courte': 200,
+    'Description': 800
+}
+
+# Marge par champ pour la clé et la ponctuation de la réponse JSON
+_JSON_KEY_TOKENS = 20
+
+def _max_tokens(field_type: str, has_html: bool = False) -> int:
+    """Plafond max_tokens pour la réécriture d'un champ (doublé si le HTML est conservé)"""
+    return _MAX_TOKENS.get(field_type, 300) * (2 if has_html else 1)
+
+def _item_max_tokens(contexts: Dict[str, Dict]) -> int:
+    """Plafond max_tokens de la réponse JSON regroupant plusieurs champs"""
+    return sum(
+        _max_tokens(context['field_type'], context['has_html']) + _JSON_KEY_TOKENS
+        for context in contexts.values()
+    )
+
+# Champs à ne jamais réécrire, par type d'élément (le nom des produits est conservé)
+_SKIP_BY_TYPE = {
+    'product': frozenset({'name'}),
+    'category': frozenset(),
+    'manufacturer': frozenset()
+}
+
+# Champs dont la réécriture est remise en paragraphes HTML
+_WRAP_FIELDS = frozenset(('Description courte', 'Description'))
+
+def _wrap_paragraphs(text: str) -> str:
+    """Découpe un texte brut en paragraphes HTML de 3 phrases"""
+    # Texte court (3 phrases ou moins) : un seul paragraphe, sans découpage
+    if text.count('. ') < 3:
+        return '<p>' + text + '</p>'
+    
+    sentences = text.split('. ')
+    html_paragraphs = []
+    for start in range(0, len(sentences), 3):
+        group = sentences[start:start + 3]
+        html_paragraphs.append(
+            '<p>' + ' '.join(s if s.endswith('.') else s + '.' for s in group) + '</p>'
+        )
+    return '\n'.join(html_paragraphs)
+
+def text_only(html_content: str) -> str:
+    """Texte sans balises HTML, pour la visualisation"""
+    return _HTML_TAG_RE.sub('', html_content or '')
+
+@dataclass(slots=True)
+class Stats:
+    """Statistiques d'une réécriture"""
+    original_length: int
+    new_length: int
+    original_word_count: int
+    new_word_count: int
+    html_preserved: bool
+    keywords_integrated: Dict[str, int]
+    price_preserved: bool
+    brand_preserved: Optional[bool]
+
+@dataclass(slots=True)
+class Rewrite:
+    """Réécriture d'un champ"""
+    field: str
+    field_name: str
+    original_content: str
+    rewritten_content: str
+    stats: Stats
+    keywords: Dict[str, int]
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Rewrite':
+        """Reconstruit une réécriture depuis sa forme JSON"""
+        return cls(**{**data, 'stats': Stats(**data['stats'])})
+
+@dataclass(slots=True)
+class Item:
+    """Résultat de la réécriture d'un élément (produit, catégorie ou marque)"""
+    id: Optional[int]
+    name: str
+    type: str
+    has_been_rewritten: bool = False
+    rewrites: List[Rewrite] = dataclass_field(default_factory=list)
+    seo_stats: Dict[str, int] = dataclass_field(default_factory=lambda: {
+        'fields_rewritten': 0,
+        'total_keywords_added': 0,
+        'html_structure_improved': 0
+    })
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Item':
+        """Reconstruit un élément depuis sa forme JSON (instantané, fichier JSONL)"""
+        return cls(**{**data, 'rewrites': [Rewrite.from_dict(rewrite) for rewrite in data['rewrites']]})
+
+@dataclass(slots=True, frozen=True)
+class ValidatedItem:
+    """Élément validé tel qu'exporté pour l'import PrestaShop"""
+    type: str
+    id: Optional[int]
+    name: str
+    rewrites: List[Rewrite]
+
+def results_from_dict(results: Dict) -> Dict:
+    """Résultats relus depuis du JSON, avec leurs éléments reconvertis en Item"""
+    return {
+        **results,
+        **{key: [Item.from_dict(item) for item in results.get(key, [])]
+           for key in ('products', 'categories', 'manufacturers')}
+    }
+
+class RateLimiter:
+    """
+    Quotas OpenAI RPM/TPM (seau à jetons rechargé en continu), partageable
+    entre les exécutions et les threads utilisant la même clé
+    """
+    def __init__(self, max_requests_per_minute: int = 500, max_tokens_per_minute: int = 200000):
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_tokens_per_minute = max_tokens_per_minute
+        self._available_requests = float(max_requests_per_minute)
+        self._available_tokens = float(max_tokens_per_minute)
+        self._last_refill = time.monotonic()
+        # Chaque exécution a sa propre boucle d'événements : le seau est protégé entre threads
+        self._lock = threading.Lock()
+
+    def _try_consume(self, n: int) -> float:
+        """Consomme un appel de n tokens si possible (0), sinon temps d'attente avant recharge"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_refill
+            self._last_refill = now
+            
+            self._available_requests = min(
+                self.max_requests_per_minute,
+                self._available_requests + elapsed * self.max_requests_per_minute / 60
+            )
+            self._available_tokens = min(
+                self.max_tokens_per_minute,
+                self._available_tokens + elapsed * self.max_tokens_per_minute / 60
+            )
+            
+            if self._available_requests >= 1 and self._available_tokens >= n:
+                self._available_requests -= 1
+                self._available_tokens -= n
+                return 0.0
+            
+            # Attendre le temps nécessaire à la recharge
+            return max(
+                (1 - self._available_requests) * 60 / self.max_requests_per_minute,
+                (n - self._available_tokens) * 60 / self.max_tokens_per_minute,
+                0.01
+            )
+
+    async def consume(self, n: int):
+        """Attend que les quotas RPM/TPM permettent un nouvel appel de n tokens"""
+        # Une requête ne peut pas dépasser la capacité totale du seau
+        n = min(n, self.max_tokens_per_minute)
+        while wait := self._try_consume(n):
+            await asyncio.sleep(wait)
+
+class RewriteCache:
+    """
+    Cache LRU borné des réécritures (empreinte -> (contenu réécrit, statistiques)),
+    partageable entre exécutions et threads
+    """
+    def __init__(self, max_size: int = REWRITE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, Tuple[str, Dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> Optional[Tuple[str, Dict]]:
+        """Réécriture en cache (None si absente), marquée comme récemment utilisée"""
+        with self._lock:
+            rewrite = self._entries.get(key)
+            if rewrite is not None:
+                self._entries.move_to_end(key)
+            return rewrite
+
+    def put(self, key: bytes, rewrite: Tuple[str, Dict]):
+        """Ajoute une réécriture en évinçant la moins récemment utilisée"""
+        with self._lock:
+            self._entries[key] = rewrite
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+@dataclass(slots=True)
+class SharedClients:
+    """
+    Objets portant des connexions ou des quotas, réutilisables par plusieurs
+    rewriters (sessions, exécutions) : les résultats restent propres à chaque instance
+    """
+    session: requests.Session
+    openai_client: openai.OpenAI
+    rate_limiter: RateLimiter
+    rewrite_cache: RewriteCache = dataclass_field(default_factory=RewriteCache)
+
+    @classmethod
+    def create(cls, prestashop_key: str, openai_api_key: str, max_requests_per_minute: int = 500,
+               max_tokens_per_minute: int = 200000) -> 'SharedClients':
+        """Session HTTP PrestaShop, client OpenAI et quotas pour une paire de clés"""
+        # Session HTTP (keep-alive, pool de connexions, relances)
+        session = requests.Session()
+        session.auth = HTTPBasicAuth(prestashop_key, '')
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.5)
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        
+        return cls(
+            session=session,
+            openai_client=openai.OpenAI(api_key=openai_api_key),
+            rate_limiter=RateLimiter(max_requests_per_minute, max_tokens_per_minute)
+        )
 
 class PrestashopSEORewriter:
-    def __init__(self, prestashop_url: str, prestashop_key: str, openai_api_key: str):
+    def __init__(self, prestashop_url: str, prestashop_key: str, openai_api_key: str,
+                 max_concurrency: int = 10, max_requests_per_minute: int = 500,
+                 max_tokens_per_minute: int = 200000, output_path: Optional[str] = None,
+                 clients: Optional[SharedClients] = None):
         """
         Initialise le système de réécriture SEO complète pour PrestaShop
         Conformité FIVAPE + Optimisation SEO avancée
+        
+        Si output_path est fourni, chaque résultat est ajouté au fichier JSONL
+        au fil de l'eau au lieu d'être conservé en mémoire (seules les
+        métadonnées et les erreurs restent dans self.results).
+        
+        clients permet de partager connexions et quotas entre plusieurs instances
+        (sinon l'instance crée les siens ; max_requests/tokens_per_minute sont alors ignorés).
         """
         self.prestashop_url = prestashop_url.rstrip('/')
         self.prestashop_key = prestashop_key
         
-        # Configuration OpenAI
-        openai.api_key = openai_api_key
-        self.openai_client = openai
+        if clients is None:
+            clients = SharedClients.create(
+                prestashop_key, openai_api_key, max_requests_per_minute, max_tokens_per_minute
+            )
+        
+        # Session HTTP PrestaShop et client OpenAI synchrone (Batch API)
+        self.session = clients.session
+        self.openai_client = clients.openai_client
+        
+        # Client asynchrone propre à chaque exécution (lié à sa boucle d'événements) ;
+        # il ne relance pas lui-même : seul _create_completion le fait
+        self.openai_api_key = openai_api_key
+        self.async_client = openai.AsyncOpenAI(api_key=openai_api_key, max_retries=0)
+        
+        # Nombre maximal d'appels OpenAI simultanés
+        self.max_concurrency = max_concurrency
+        self._rpm_sem = asyncio.Semaphore(max_concurrency)
+        
+        # Quotas OpenAI et cache des réécritures (éventuellement partagés avec d'autres instances)
+        self.rate_limiter = clients.rate_limiter
+        self._rewrite_cache = clients.rewrite_cache
+        
+        # Flux JSONL des résultats (ouvert à la première écriture)
+        self.output_path = output_path
+        self._out = None
         
         # Stockage des résultats
+        self.reset_results()
+
+    def reset_results(self):
+        """
+        Repart de résultats vides pour une nouvelle exécution (instance réutilisée) ;
+        le dictionnaire précédent, déjà renvoyé à l'appelant, n'est pas modifié
+        """
         self.results = {
             'metadata': {
                 'date': datetime.now().isoformat(),
-                'url': prestashop_url,
+                'url': self.prestashop_url,
                 'total_products_analyzed': 0,
                 'total_categories_analyzed': 0,
                 'total_manufacturers_analyzed': 0,
@@ -47,60 +460,105 @@ class PrestashopSEORewriter:
             return "", {}
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            tree = LexborHTMLParser(html_content)
             
             # Préserver les images
-            images = []
-            for img in soup.find_all('img'):
-                images.append({
-                    'src': img.get('src', ''),
-                    'alt': img.get('alt', ''),
-                    'title': img.get('title', '')
-                })
+            images = [
+                {
+                    'src': img.attributes.get('src') or '',
+                    'alt': img.attributes.get('alt') or '',
+                    'title': img.attributes.get('title') or ''
+                }
+                for img in tree.css('img')
+            ]
             
             # Préserver les liens
-            links = []
-            for link in soup.find_all('a'):
-                links.append({
-                    'href': link.get('href', ''),
-                    'text': link.get_text(),
-                    'title': link.get('title', '')
-                })
+            links = [
+                {
+                    'href': link.attributes.get('href') or '',
+                    'text': link.text(),
+                    'title': link.attributes.get('title') or ''
+                }
+                for link in tree.css('a')
+            ]
             
             # Structure HTML
             structure = {
                 'images': images,
                 'links': links,
-                'has_lists': bool(soup.find_all(['ul', 'ol'])),
-                'has_headings': bool(soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])),
+                'has_lists': tree.css_first('ul, ol') is not None,
+                'has_headings': tree.css_first('h1, h2, h3, h4, h5, h6') is not None,
+                'has_tables': tree.css_first('table') is not None,
+                # Balise autre que la mise en forme simple reconstruite au post-traitement
+                'has_rich_markup': any(
+                    node.tag not in _PLAIN_TAGS for node in tree.css('*')
+                ),
                 'original_html': html_content
             }
             
-            # Texte pour analyse
-            text = soup.get_text(separator=' ', strip=True)
+            # Texte pour analyse (espaces normalisés)
+            text = ' '.join(tree.text(separator=' ').split())
             
             return text, structure
             
         except Exception as e:
             return html_content, {'original_html': html_content}
 
-    def rewrite_content_with_seo(self, content: str, field_type: str, item_name: str, 
-                                 item_type: str, html_structure: Dict) -> Tuple[str, Dict]:
+    def _reset_rate_limiter(self):
         """
-        Réécrit complètement le contenu avec optimisation SEO et conformité FIVAPE
+        Point unique de régulation des appels OpenAI pour une nouvelle exécution :
+        le sémaphore et le client asynchrone (pool de connexions httpx) doivent
+        appartenir à la boucle d'événements courante, les quotas RPM/TPM
+        (rate_limiter) sont conservés d'une exécution à l'autre
+        """
+        self._rpm_sem = asyncio.Semaphore(self.max_concurrency)
+        self.async_client = openai.AsyncOpenAI(api_key=self.openai_api_key, max_retries=0)
+
+    @asynccontextmanager
+    async def _openai_run(self):
+        """
+        Exécution asynchrone : régulation et client OpenAI propres à la boucle courante,
+        client (son pool httpx ne survit pas à la boucle) et fichier JSONL fermés à la fin
+        """
+        self._reset_rate_limiter()
+        try:
+            yield
+        finally:
+            self.close()
+            await self.async_client.close()
+
+    async def _consume_tokens(self, n: int):
+        """Attend que les quotas RPM/TPM permettent un nouvel appel de n tokens"""
+        await self.rate_limiter.consume(n)
+
+    @retry(
+        wait=wait_random_exponential(min=1, max=30),
+        stop=stop_after_attempt(3),
+        retry=retry_if_exception_type(RETRYABLE_OPENAI_ERRORS),
+        reraise=True
+    )
+    async def _create_completion(self, estimated_tokens: int, **kwargs):
+        """Appel chat.completions limité par les quotas, relancé sur 429/timeout"""
+        async with self._rpm_sem:
+            await self._consume_tokens(estimated_tokens)
+            return await self.async_client.chat.completions.create(**kwargs)
+
+    def _prepare_rewrite(self, content: str, field_type: str, item_name: str,
+                         item_type: str) -> Optional[Dict]:
+        """
+        Prépare le prompt de réécriture d'un champ (None si le contenu est trop court)
         """
         if not content or len(content.strip()) < 10:
-            return content, {}
+            return None
         
-        # Vérifier et préserver "Le Vapoteur Discount"
-        has_vapoteur_discount = "Le Vapoteur Discount" in content or "le vapoteur discount" in content.lower()
+        # Vérifier et préserver "Le Vapoteur Discount" (quelle que soit la casse)
+        has_vapoteur_discount = "le vapoteur discount" in content.casefold()
         
         # SPECIAL : Préserver le prix dans les Meta Description
         price_prefix = ""
         if field_type == "Meta description":
-            # Chercher le pattern "Prix : X,XX € |"
-            price_match = re.match(r'(Prix\s*:\s*[\d,]+\s*€\s*\|\s*)', content)
-            if price_match:
+            # Chercher le pattern "Prix : X,XX € |" (test littéral avant la regex)
+            if content.startswith('Prix') and (price_match := _PRICE_RE.match(content)):
                 price_prefix = price_match.group(1)
                 # Enlever le prix du contenu à réécrire
                 content = content[len(price_prefix):].strip()
@@ -115,260 +573,372 @@ class PrestashopSEORewriter:
         
         target_length = length_targets.get(field_type, '100-200 mots')
         
-        try:
-            # Instructions spéciales
-            brand_instruction = ""
-            if has_vapoteur_discount:
-                brand_instruction = """
-IMPORTANT : Si le texte contient "Le Vapoteur Discount" - CONSERVE EXACTEMENT cette mention avec cette orthographe."""
-            
-            price_instruction = ""
-            if price_prefix:
-                price_instruction = f"""
-TRÈS IMPORTANT : Le texte commence par "{price_prefix}" - NE PAS l'inclure dans ta réécriture, je l'ajouterai moi-même."""
-            
-            prompt = f"""Tu es un expert SEO ET un spécialiste de la conformité réglementaire pour les produits de vapotage.
-
-CONTEXTE LÉGAL FIVAPE (Avril 2024) :
-- Directive européenne 2014/40/UE et Code de la Santé Publique
-- Interdiction TOTALE des termes promotionnels et subjectifs
-- Uniquement des informations factuelles et techniques
-
-PRODUIT : {item_name}
-TYPE : {item_type}
-CHAMP : {field_type}
-LONGUEUR CIBLE : {target_length}
+        # HTML conservé par _collect_fields (images, liens, listes) : à préserver tel quel
+        has_html = _HTML_TAG_RE.search(content) is not None
+        
+        prompt = _prompt_skeleton(
+            field_type, item_type, target_length, has_vapoteur_discount, bool(price_prefix), has_html
+        ).substitute(item_name=item_name, content=content, price_prefix=price_prefix)
+        
+        return {
+            'content': content,
+            'field_type': field_type,
+            'price_prefix': price_prefix,
+            'has_vapoteur_discount': has_vapoteur_discount,
+            'has_html': has_html,
+            'target_length': target_length,
+            'prompt': prompt
+        }
 
-CONTENU À RÉÉCRIRE (sans le prix si présent) :
-{content}
+    def _completion_body(self, prompt: str, max_tokens: int, json_output: bool = False) -> Dict:
+        """Paramètres de l'appel chat.completions (aussi utilisés pour la Batch API)"""
+        body = {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": "Expert SEO vapotage. Rédaction factuelle conforme FIVAPE."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "max_tokens": max_tokens,
+            "n": 1,
+            "stream": False
+        }
+        if json_output:
+            body["response_format"] = {"type": "json_object"}
+        return body
 
-{brand_instruction}
-{price_instruction}
+    def _finalize_rewrite(self, rewritten_content: str, context: Dict) -> Tuple[str, Dict]:
+        """
+        Post-traitement de la réponse du modèle : nettoyage, prix, HTML et statistiques
+        """
+        content = context['content']
+        field_type = context['field_type']
+        price_prefix = context['price_prefix']
+        has_vapoteur_discount = context['has_vapoteur_discount']
+        
+        rewritten_content = rewritten_content.strip()
+        
+        # Nettoyer les marqueurs de code (en conservant le texte qu'ils entourent)
+        if '```' in rewritten_content:
+            rewritten_content = _FENCE_RE.sub('', rewritten_content).strip()
+        
+        # Réajouter le prix au début si c'était une Meta Description
+        if price_prefix:
+            rewritten_content = price_prefix + rewritten_content
+        
+        # Ajouter des balises HTML si c'est une description et qu'il n'y en a pas
+        if field_type in _WRAP_FIELDS and '<' not in rewritten_content:
+            rewritten_content = _wrap_paragraphs(rewritten_content)
+        
+        # Statistiques avec calcul correct du nombre de mots
+        rewritten_word_count = len(rewritten_content.split())
+        original_word_count = len((content + price_prefix if price_prefix else content).split())
+        
+        stats = {
+            'original_length': len(content + price_prefix if price_prefix else content),
+            'new_length': len(rewritten_content),
+            'original_word_count': original_word_count,
+            'new_word_count': rewritten_word_count,
+            'html_preserved': bool(_HTML_TAG_RE.search(rewritten_content)),
+            'keywords_integrated': self.count_keywords(rewritten_content),
+            'price_preserved': bool(price_prefix),
+            'brand_preserved': "Le Vapoteur Discount" in rewritten_content if has_vapoteur_discount else None
+        }
+        
+        return rewritten_content, stats
 
-MISSION : Réécrire ce contenu en respectant STRICTEMENT :
+    @staticmethod
+    def _cache_key(content: str, field_type: str, item_type: str) -> bytes:
+        """
+        Empreinte d'un contenu à réécrire pour le cache des réécritures : le nom de
+        l'élément n'en fait pas partie, pour réutiliser les textes partagés entre déclinaisons
+        """
+        return hashlib.blake2b(
+            f"{field_type}|{item_type}|{content}".encode('utf-8'), digest_size=16
+        ).digest()
 
-1. SUPPRIMER tous les termes de ce type : délicieux, savoureux, gourmand, excellent, parfait, bonheur, plaisir, intense, etc.
-2. GARDER uniquement les informations factuelles
-3. Si c'est une Meta Description, rester TRÈS concis ({target_length})
-4. Si c'est un Meta titre, être court et percutant ({target_length})
-5. Préserver les informations techniques : compatibilité, résistances, formats
+    def _cache_rewrite(self, content: str, field_type: str, item_type: str, item_name: str,
+                       rewrite: Tuple[str, Dict]):
+        """
+        Met une réécriture en cache si elle ne dépend pas de l'élément : une réponse
+        citant le nom de l'élément (absent du texte source) n'est pas réutilisable
+        """
+        name = item_name.casefold()
+        if name and name in rewrite[0].casefold() and name not in content.casefold():
+            return
+        self._rewrite_cache.put(self._cache_key(content, field_type, item_type), rewrite)
 
-Fournis UNIQUEMENT le texte réécrit, sans le prix, sans commentaires."""
-            
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "Expert SEO vapotage. Rédaction factuelle conforme FIVAPE."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
+    async def rewrite_content_with_seo(self, content: str, field_type: str, item_name: str,
+                                       item_type: str) -> Tuple[str, Dict]:
+        """
+        Réécrit complètement le contenu avec optimisation SEO et conformité FIVAPE
+        """
+        # Contenu déjà réécrit (textes partagés entre déclinaisons) : servi depuis le cache
+        cached = self._rewrite_cache.get(self._cache_key(content, field_type, item_type))
+        if cached is not None:
+            return cached
+        
+        context = self._prepare_rewrite(content, field_type, item_name, item_type)
+        if context is None:
+            return content, {}
+        
+        try:
+            response = await self._create_completion(
+                len(context['prompt']) // 4,
+                **self._completion_body(context['prompt'], _max_tokens(context['field_type'], context['has_html']))
             )
+            choice = response.choices[0]
+            if choice.finish_reason == 'length':
+                # Texte incomplet : ni exporté ni mis en cache, le champ reste à relancer
+                raise TruncatedResponseError(f"Réponse tronquée ({field_type})")
+            rewrite = self._finalize_rewrite(choice.message.content, context)
+            self._cache_rewrite(content, field_type, item_type, item_name, rewrite)
+            return rewrite
             
-            rewritten_content = response.choices[0].message.content.strip()
-            
-            # Nettoyer les marqueurs de code
-            if '```' in rewritten_content:
-                lines = rewritten_content.split('\n')
-                cleaned_lines = []
-                in_code_block = False
-                for line in lines:
-                    if '```' in line:
-                        in_code_block = not in_code_block
-                    elif not in_code_block:
-                        cleaned_lines.append(line)
-                rewritten_content = '\n'.join(cleaned_lines).strip()
-            
-            # Réajouter le prix au début si c'était une Meta Description
-            if price_prefix:
-                rewritten_content = price_prefix + rewritten_content
-            
-            # Ajouter des balises HTML si c'est une description et qu'il n'y en a pas
-            if field_type in ['Description courte', 'Description'] and '<' not in rewritten_content:
-                # Diviser en paragraphes si le texte est long
-                paragraphs = rewritten_content.split('. ')
-                if len(paragraphs) > 3:
-                    # Créer des paragraphes HTML
-                    html_paragraphs = []
-                    current_p = []
-                    for i, sentence in enumerate(paragraphs):
-                        current_p.append(sentence + ('.' if not sentence.endswith('.') else ''))
-                        if (i + 1) % 3 == 0 or i == len(paragraphs) - 1:
-                            html_paragraphs.append('<p>' + ' '.join(current_p) + '</p>')
-                            current_p = []
-                    rewritten_content = '\n'.join(html_paragraphs)
-                else:
-                    rewritten_content = '<p>' + rewritten_content + '</p>'
-            
-            # Statistiques avec calcul correct du nombre de mots
-            rewritten_word_count = len(rewritten_content.split())
-            original_word_count = len((content + price_prefix if price_prefix else content).split())
-            
-            stats = {
-                'original_length': len(content + price_prefix if price_prefix else content),
-                'new_length': len(rewritten_content),
-                'original_word_count': original_word_count,
-                'new_word_count': rewritten_word_count,
-                'html_preserved': bool(re.search(r'<[^>]+>', rewritten_content)),
-                'keywords_integrated': self.count_keywords(rewritten_content),
-                'price_preserved': bool(price_prefix),
-                'brand_preserved': "Le Vapoteur Discount" in rewritten_content if has_vapoteur_discount else None
-            }
-            
-            return rewritten_content, stats
-            
+        except (openai.OpenAIError, TruncatedResponseError):
+            # Erreur API définitive ou réponse tronquée : remontée à process_item qui la journalise
+            raise
         except Exception as e:
             print(f"[ERREUR] Réécriture: {e}")
             # En cas d'erreur, retourner l'original avec le prix si présent
-            return (price_prefix + content) if price_prefix else content, {}
+            price_prefix = context['price_prefix']
+            return (price_prefix + context['content']) if price_prefix else context['content'], {}
+
+    async def rewrite_item_fields(self, item_name: str, item_type: str,
+                                  fields: Dict[str, Tuple[str, str]]) -> Dict:
+        """
+        Réécrit tous les champs d'un élément en un seul appel OpenAI (réponse JSON)
+        
+        fields : {clé du champ: (libellé, contenu original)}
+        Retourne {clé du champ: (contenu réécrit, statistiques)} ; un champ
+        en échec contient l'exception correspondante.
+        """
+        rewrites = {}
+        contexts = {}
+        for field, (field_name, content) in fields.items():
+            cached = self._rewrite_cache.get(self._cache_key(content, field_name, item_type))
+            if cached is not None:
+                rewrites[field] = cached
+                continue
+            
+            context = self._prepare_rewrite(content, field_name, item_name, item_type)
+            if context is None:
+                rewrites[field] = (content, {})
+            else:
+                contexts[field] = context
+        
+        if not contexts:
+            return rewrites
+        
+        # Un seul champ : le prompt dédié suffit
+        if len(contexts) == 1:
+            field, = contexts
+            field_name, content = fields[field]
+            try:
+                rewrites[field] = await self.rewrite_content_with_seo(content, field_name, item_name, item_type)
+            except Exception as e:
+                rewrites[field] = e
+            return rewrites
+        
+        prompt = _item_prompt(item_name, item_type, contexts)
+        try:
+            response = await self._create_completion(
+                len(prompt) // 4,
+                **self._completion_body(prompt, _item_max_tokens(contexts), json_output=True)
+            )
+            # Réponse tronquée : JSON incomplet, chaque champ est relancé individuellement
+            if response.choices[0].finish_reason == 'length':
+                raise TruncatedResponseError("réponse tronquée")
+            rewritten_fields = orjson.loads(response.choices[0].message.content)
+            if not isinstance(rewritten_fields, dict):
+                raise ValueError("objet JSON attendu")
+        except openai.OpenAIError as e:
+            # Erreur API définitive : tous les champs de l'appel sont en échec
+            return {**rewrites, **{field: e for field in contexts}}
+        except Exception as e:
+            print(f"[ERREUR] Réponse JSON invalide ({item_name}): {e}")
+            rewritten_fields = {}
+        
+        # Champs absents ou invalides dans la réponse : réécriture individuelle
+        retries = []
+        for field, context in contexts.items():
+            rewritten = rewritten_fields.get(field)
+            if isinstance(rewritten, str) and rewritten.strip():
+                rewrite = self._finalize_rewrite(rewritten, context)
+                field_name, content = fields[field]
+                self._cache_rewrite(content, field_name, item_type, item_name, rewrite)
+                rewrites[field] = rewrite
+            else:
+                retries.append(field)
+        
+        outcomes = await asyncio.gather(
+            *(self.rewrite_content_with_seo(fields[field][1], fields[field][0], item_name, item_type)
+              for field in retries),
+            return_exceptions=True
+        )
+        rewrites.update(zip(retries, outcomes))
+        
+        return rewrites
 
     def count_keywords(self, text: str) -> Dict[str, int]:
         """Compte les mots-clés SEO importants dans le texte"""
-        keywords = {
-            'e-liquide': len(re.findall(r'e-liquide', text, re.IGNORECASE)),
-            'vapotage': len(re.findall(r'vapotage', text, re.IGNORECASE)),
-            'cigarette électronique': len(re.findall(r'cigarette électronique', text, re.IGNORECASE)),
-            'vape': len(re.findall(r'vape', text, re.IGNORECASE)),
-            'nicotine': len(re.findall(r'nicotine', text, re.IGNORECASE))
-        }
-        return keywords
+        counts = Counter(match.lastgroup for match in _ALL_KEYWORDS_RE.finditer(text))
+        return {label: counts[group] for group, label in _KEYWORD_LABELS.items()}
 
     def extract_content(self, field_data) -> str:
         """Extrait le contenu d'un champ PrestaShop"""
-        content = ""
-        
-        if isinstance(field_data, dict):
-            if 'language' in field_data:
-                languages = field_data.get('language', [])
-                if isinstance(languages, list):
-                    content = languages[0].get('value', '') if languages else ''
-                elif isinstance(languages, dict):
-                    content = languages.get('value', '')
-            else:
-                content = field_data.get('value', str(field_data))
-        elif isinstance(field_data, list):
-            content = field_data[0] if field_data else ''
-        else:
-            content = str(field_data) if field_data else ''
+        # Cas le plus fréquent (boutique mono-langue) : la valeur est déjà une chaîne
+        if isinstance(field_data, str):
+            return field_data
         
-        return content
-
-    def process_item(self, item: Dict, item_type: str, fields_to_process: Dict) -> Dict:
-        """Traite un élément (produit, catégorie ou marque)"""
-        item_id = item.get('id')
+        if not isinstance(field_data, dict):
+            if isinstance(field_data, list):
+                return field_data[0] if field_data else ''
+            return str(field_data) if field_data else ''
         
-        # Extraire le nom
+        if 'language' not in field_data:
+            return field_data.get('value', str(field_data))
+        
+        languages = field_data['language']
+        if isinstance(languages, list):
+            return languages[0].get('value', '') if languages else ''
+        if isinstance(languages, dict):
+            return languages.get('value', '')
+        return ""
+
+    def _item_name(self, item: Dict, item_type: str) -> str:
+        """Nom lisible d'un élément, utilisé dans les prompts et l'interface"""
         name_content = self.extract_content(item.get('name', ''))
-        name_text = re.sub(r'<[^>]+>', '', name_content)
-        item_name = name_text[:100] if name_text else f"{item_type} {item_id}"
-        
-        result = {
-            'id': item_id,
-            'name': item_name,
-            'type': item_type,
-            'has_been_rewritten': False,
-            'rewrites': [],
-            'seo_stats': {
-                'fields_rewritten': 0,
-                'total_keywords_added': 0,
-                'html_structure_improved': 0
-            }
-        }
+        name_text = _HTML_TAG_RE.sub('', name_content)
+        return name_text[:100] if name_text else f"{item_type} {item.get('id')}"
+
+    def _collect_fields(self, item: Dict, item_type: str, fields_to_process: Dict) -> List[Tuple]:
+        """
+        Liste les champs à réécrire :
+        (champ, libellé, contenu original, contenu envoyé au modèle)
         
+        Le texte seul est envoyé pour un HTML simple (p, br, span, div),
+        reconstruit au post-traitement ; le HTML original l'est dès qu'il contient
+        une autre balise (images, liens, listes, titres, tableaux, gras...),
+        que le modèle doit conserver
+        """
         # IMPORTANT : Filtrer les champs à NE PAS modifier
-        fields_to_skip = []
-        if item_type == 'product':
-            # Pour les produits, on ne touche PAS au nom seulement
-            fields_to_skip = ['name']
+        fields_to_skip = _SKIP_BY_TYPE.get(item_type, frozenset())
         
+        pending = []
         for field, field_name in fields_to_process.items():
             # SKIP les champs protégés
             if field in fields_to_skip:
                 continue
+            
+            value = item.get(field)
+            if not value:
+                continue
+            
+            original_content = self.extract_content(value)
+            
+            if original_content and len(original_content.strip()) > 5:
+                # Extraire et préserver la structure HTML
+                text_content, html_structure = self.extract_and_preserve_html(original_content)
+                if html_structure.get('has_rich_markup'):
+                    text_content = original_content
+                pending.append((field, field_name, original_content, text_content))
+        
+        return pending
+
+    def _build_result(self, item: Dict, item_type: str, item_name: str,
+                      pending: List[Tuple], outcomes: List) -> Item:
+        """Assemble le résultat d'un élément à partir des réécritures de ses champs"""
+        item_id = item.get('id')
+        
+        result = Item(id=item_id, name=item_name, type=item_type)
+        
+        for (field, field_name, original_content, _), outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"[ERREUR] Réécriture {item_type} {item_id} ({field}): {outcome}")
+                # Conserver l'échec pour pouvoir relancer ce champ lors d'une seconde passe
+                self.results['errors'].append({
+                    'item_type': item_type,
+                    'item_id': item_id,
+                    'field': field,
+                    'error': str(outcome),
+                    'retryable': not isinstance(outcome, openai.BadRequestError)
+                })
+                continue
+            
+            rewritten_content, stats = outcome
+            
+            # Sans statistiques, le champ n'a pas été réécrit (contenu trop court ou erreur)
+            if stats and rewritten_content != original_content:
+                result.has_been_rewritten = True
+                result.seo_stats['fields_rewritten'] += 1
                 
-            if field in item:
-                original_content = self.extract_content(item[field])
+                # Compter les mots-clés ajoutés
+                if stats.get('keywords_integrated'):
+                    total_keywords = sum(stats['keywords_integrated'].values())
+                    result.seo_stats['total_keywords_added'] += total_keywords
                 
-                if original_content and len(original_content.strip()) > 5:
-                    # Extraire et préserver la structure HTML
-                    text_content, html_structure = self.extract_and_preserve_html(original_content)
-                    
-                    # Réécrire avec SEO
-                    rewritten_content, stats = self.rewrite_content_with_seo(
-                        original_content,  # Passer le contenu original complet
-                        field_name, 
-                        item_name, 
-                        item_type, 
-                        html_structure
-                    )
-                    
-                    if rewritten_content != original_content:
-                        result['has_been_rewritten'] = True
-                        result['seo_stats']['fields_rewritten'] += 1
-                        
-                        # Compter les mots-clés ajoutés
-                        if stats.get('keywords_integrated'):
-                            total_keywords = sum(stats['keywords_integrated'].values())
-                            result['seo_stats']['total_keywords_added'] += total_keywords
-                        
-                        # Extraire le texte sans HTML pour la visualisation
-                        original_text_only = re.sub(r'<[^>]+>', '', original_content)
-                        rewritten_text_only = re.sub(r'<[^>]+>', '', rewritten_content)
-                        
-                        rewrite_data = {
-                            'field': field,
-                            'field_name': field_name,
-                            'original_content': original_content,
-                            'rewritten_content': rewritten_content,
-                            'original_text_only': original_text_only,
-                            'rewritten_text_only': rewritten_text_only,
-                            'stats': stats,
-                            'keywords': stats.get('keywords_integrated', {})
-                        }
-                        
-                        result['rewrites'].append(rewrite_data)
+                result.rewrites.append(Rewrite(
+                    field=field,
+                    field_name=field_name,
+                    original_content=original_content,
+                    rewritten_content=rewritten_content,
+                    stats=Stats(**stats),
+                    keywords=stats.get('keywords_integrated', {})
+                ))
         
         return result
 
-    def get_products(self, limit: Optional[int] = None) -> List[Dict]:
-        """Récupère les produits depuis PrestaShop"""
-        try:
-            url = f"{self.prestashop_url}/api/products"
-            params = {'display': '[id]', 'output_format': 'JSON'}
-            if limit:
-                params['limit'] = str(limit)
-            
-            response = requests.get(
-                url,
-                auth=HTTPBasicAuth(self.prestashop_key, ''),
-                params=params,
+    async def process_item(self, item: Dict, item_type: str, fields_to_process: Dict) -> Item:
+        """Traite un élément (produit, catégorie ou marque)"""
+        item_name = self._item_name(item, item_type)
+        
+        # Préparer les champs à réécrire
+        pending = self._collect_fields(item, item_type, fields_to_process)
+        
+        # Réécrire avec SEO (tous les champs en une seule requête)
+        rewrites = await self.rewrite_item_fields(item_name, item_type, {
+            field: (field_name, model_content)
+            for field, field_name, original_content, model_content in pending
+        })
+        outcomes = [rewrites[field] for field, *_ in pending]
+        
+        return self._build_result(item, item_type, item_name, pending, outcomes)
+
+    def _fetch_full(self, resource: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Récupère les éléments complets d'une ressource en une requête par page
+        (display=full) plutôt qu'une requête par ID
+        """
+        items = []
+        offset = 0
+        
+        while limit is None or offset < limit:
+            page_size = FULL_PAGE_SIZE if limit is None else min(FULL_PAGE_SIZE, limit - offset)
+            response = self.session.get(
+                f"{self.prestashop_url}/api/{resource}",
+                params={'display': 'full', 'output_format': 'JSON', 'limit': f"{offset},{page_size}"},
                 verify=True
             )
             
             if response.status_code != 200:
-                return []
+                break
             
-            product_ids = response.json().get('products', [])
-            if limit:
-                product_ids = product_ids[:limit]
-            
-            products = []
-            for product_data in product_ids:
-                product_id = product_data.get('id')
-                detail_url = f"{self.prestashop_url}/api/products/{product_id}"
-                detail_response = requests.get(
-                    detail_url,
-                    auth=HTTPBasicAuth(self.prestashop_key, ''),
-                    params={'output_format': 'JSON'},
-                    verify=True
-                )
-                
-                if detail_response.status_code == 200:
-                    product = detail_response.json().get('product', {})
-                    products.append(product)
-            
-            return products
+            # PrestaShop renvoie une liste vide (et non un objet) quand il n'y a plus de résultats
+            data = orjson.loads(response.content)
+            page = data.get(resource, []) if isinstance(data, dict) else []
+            items.extend(page)
             
+            if len(page) < page_size:
+                break
+            offset += page_size
+        
+        return items
+
+    def get_products(self, limit: Optional[int] = None) -> List[Dict]:
+        """Récupère les produits depuis PrestaShop"""
+        try:
+            return self._fetch_full('products', limit)
         except Exception as e:
             print(f"[ERREUR] Récupération produits: {e}")
             return []
@@ -376,42 +946,7 @@ Fournis UNIQUEMENT le texte réécrit, sans le prix, sans commentaires."""
     def get_categories(self, limit: Optional[int] = None) -> List[Dict]:
         """Récupère les catégories depuis PrestaShop"""
         try:
-            url = f"{self.prestashop_url}/api/categories"
-            params = {'display': '[id]', 'output_format': 'JSON'}
-            if limit:
-                params['limit'] = str(limit)
-            
-            response = requests.get(
-                url,
-                auth=HTTPBasicAuth(self.prestashop_key, ''),
-                params=params,
-                verify=True
-            )
-            
-            if response.status_code != 200:
-                return []
-            
-            category_ids = response.json().get('categories', [])
-            if limit:
-                category_ids = category_ids[:limit]
-            
-            categories = []
-            for cat_data in category_ids:
-                category_id = cat_data.get('id')
-                detail_url = f"{self.prestashop_url}/api/categories/{category_id}"
-                detail_response = requests.get(
-                    detail_url,
-                    auth=HTTPBasicAuth(self.prestashop_key, ''),
-                    params={'output_format': 'JSON'},
-                    verify=True
-                )
-                
-                if detail_response.status_code == 200:
-                    category = detail_response.json().get('category', {})
-                    categories.append(category)
-            
-            return categories
-            
+            return self._fetch_full('categories', limit)
         except Exception as e:
             print(f"[ERREUR] Récupération catégories: {e}")
             return []
@@ -419,48 +954,124 @@ Fournis UNIQUEMENT le texte réécrit, sans le prix, sans commentaires."""
     def get_manufacturers(self, limit: Optional[int] = None) -> List[Dict]:
         """Récupère les marques depuis PrestaShop"""
         try:
-            url = f"{self.prestashop_url}/api/manufacturers"
-            params = {'display': '[id]', 'output_format': 'JSON'}
-            if limit:
-                params['limit'] = str(limit)
-            
-            response = requests.get(
-                url,
-                auth=HTTPBasicAuth(self.prestashop_key, ''),
-                params=params,
-                verify=True
-            )
-            
-            if response.status_code != 200:
-                return []
-            
-            manufacturer_ids = response.json().get('manufacturers', [])
-            if limit:
-                manufacturer_ids = manufacturer_ids[:limit]
-            
-            manufacturers = []
-            for man_data in manufacturer_ids:
-                manufacturer_id = man_data.get('id')
-                detail_url = f"{self.prestashop_url}/api/manufacturers/{manufacturer_id}"
-                detail_response = requests.get(
-                    detail_url,
-                    auth=HTTPBasicAuth(self.prestashop_key, ''),
-                    params={'output_format': 'JSON'},
-                    verify=True
-                )
-                
-                if detail_response.status_code == 200:
-                    manufacturer = detail_response.json().get('manufacturer', {})
-                    manufacturers.append(manufacturer)
-            
-            return manufacturers
-            
+            return self._fetch_full('manufacturers', limit)
         except Exception as e:
             print(f"[ERREUR] Récupération marques: {e}")
             return []
 
-    def run_with_params(self, element_type: str, nb_items: int, progress_callback=None):
-        """Version adaptée pour Streamlit sans input utilisateur"""
+    def _async_prestashop_client(self) -> httpx.AsyncClient:
+        """
+        Client HTTP asynchrone PrestaShop, à ouvrir dans la boucle d'événements
+        qui l'utilise (un client par exécution)
+        """
+        # Avec un transport explicite, httpx ignore limits= et les proxys de l'environnement :
+        # les deux sont donc portés par le transport (mêmes règles HTTP(S)_PROXY/NO_PROXY que requests)
+        proxy_url = requests.utils.select_proxy(
+            self.prestashop_url, requests.utils.get_environ_proxies(self.prestashop_url)
+        )
+        return httpx.AsyncClient(
+            auth=(self.prestashop_key, ''),
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,
+                limits=httpx.Limits(max_connections=FETCH_WORKERS, max_keepalive_connections=FETCH_WORKERS),
+                proxy=httpx.Proxy(proxy_url) if proxy_url else None
+            ),
+            timeout=30.0
+        )
+
+    async def _fetch_detail(self, client: httpx.AsyncClient, resource: str, key: str,
+                            item_id) -> Optional[Dict]:
+        """Récupère le détail d'un élément PrestaShop (None si indisponible)"""
+        detail_response = await client.get(
+            f"{self.prestashop_url}/api/{resource}/{item_id}",
+            params={'output_format': 'JSON'}
+        )
+        
+        if detail_response.status_code == 200:
+            return orjson.loads(detail_response.content).get(key, {})
+        return None
+
+    async def _fetch_by_ids(self, resource: str, key: str, ids: List[int],
+                            progress_callback=None, progress_label: Optional[str] = None) -> List[Dict]:
+        """Récupère en parallèle le détail d'éléments PrestaShop à partir de leurs IDs"""
+        window = asyncio.Semaphore(FETCH_WORKERS)
+        done = 0
+        
+        async def fetch_one(client, item_id):
+            nonlocal done
+            async with window:
+                try:
+                    detail = await self._fetch_detail(client, resource, key, item_id)
+                except Exception:
+                    detail = None
+            
+            # La progression est remontée depuis la boucle d'événements (thread appelant)
+            done += 1
+            if progress_callback:
+                progress_callback(done, len(ids), progress_label.format(id=item_id))
+            return detail
+        
+        async with self._async_prestashop_client() as client:
+            details = await asyncio.gather(*(fetch_one(client, item_id) for item_id in ids))
+        
+        # gather conserve l'ordre des IDs demandés
+        return [detail for detail in details if detail is not None]
+
+    def close(self):
+        """Ferme le fichier JSONL des résultats s'il est ouvert"""
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _store_result(self, item_type: str, result: Item):
+        """Ajoute le résultat d'un élément et met à jour les compteurs"""
+        results_key = {
+            'product': 'products',
+            'category': 'categories',
+            'manufacturer': 'manufacturers'
+        }[item_type]
+        
+        if self.output_path:
+            if self._out is None:
+                # Ligne par ligne : le fichier reste exploitable même si le traitement s'interrompt
+                self._out = open(self.output_path, 'a', encoding='utf-8', buffering=1)
+            self._out.write(orjson.dumps(result).decode('utf-8') + '\n')
+        else:
+            self.results[results_key].append(result)
+        
+        if result.has_been_rewritten:
+            self.results['metadata']['items_rewritten'] += 1
+
+    async def _process_items(self, items: List[Dict], item_type: str, fields: Dict,
+                             progress_callback=None, progress_label: Optional[str] = None):
+        """Traite une liste d'éléments en parallèle (fenêtre bornée) et stocke les résultats"""
+        # Fenêtre d'éléments traités simultanément
+        window = asyncio.Semaphore(self.max_concurrency)
+        done = 0
+        
+        async def run_one(item):
+            nonlocal done
+            async with window:
+                result = await self.process_item(item, item_type, fields)
+            done += 1
+            if progress_callback and progress_label:
+                progress_callback(done, len(items), progress_label.format(
+                    i=done, total=len(items), id=item.get('id')
+                ))
+            return result
+        
+        # gather conserve l'ordre des éléments
+        for result in await asyncio.gather(*(run_one(item) for item in items)):
+            self._store_result(item_type, result)
+
+    def _fetch_for_params(self, element_type: str, nb_items: int) -> List[Tuple[str, List[Dict], Dict]]:
+        """Récupère les X premiers éléments de chaque type demandé, avec les champs à traiter"""
         
         if nb_items == 0:
             nb_items = None
@@ -475,205 +1086,342 @@ Fournis UNIQUEMENT le texte réécrit, sans le prix, sans commentaires."""
         
         choice = type_map.get(element_type, "1")
         
-        # Traitement selon le choix
+        # (type, récupération, compteur, champs à traiter) pour chaque ressource demandée
+        requested = []
+        
         if choice in ['1', '4']:  # Produits
-            products = self.get_products(nb_items)
-            if products:
-                self.results['metadata']['total_products_analyzed'] = len(products)
+            requested.append(('product', self.get_products, 'total_products_analyzed', {
+                'name': 'Nom du produit',
+                'description_short': 'Description courte',
+                'meta_title': 'Meta titre',
+                'meta_description': 'Meta description'
+            }))
+        
+        if choice in ['2', '4']:  # Catégories
+            requested.append(('category', self.get_categories, 'total_categories_analyzed', {
+                'name': 'Nom de la catégorie',
+                'description': 'Description',
+                'additional_description': 'Informations complémentaires',
+                'meta_title': 'Balise titre',
+                'meta_description': 'Meta description'
+            }))
+        
+        if choice in ['3', '4']:  # Marques
+            requested.append(('manufacturer', self.get_manufacturers, 'total_manufacturers_analyzed', {
+                'name': 'Nom',
+                'short_description': 'Résumé',
+                'description': 'Description',
+                'meta_title': 'Balise titre',
+                'meta_description': 'Meta description'
+            }))
+        
+        # Récupération des ressources l'une après l'autre (session HTTP non partagée entre threads)
+        fetched = []
+        for item_type, get_items, total_key, fields in requested:
+            items = get_items(nb_items)
+            if items:
+                self.results['metadata'][total_key] = len(items)
+                fetched.append((item_type, items, fields))
+        
+        return fetched
+
+    def run_with_params(self, element_type: str, nb_items: int, progress_callback=None):
+        """Version adaptée pour Streamlit sans input utilisateur"""
+        return asyncio.run(self.run_with_params_async(element_type, nb_items, progress_callback))
+
+    async def run_with_params_async(self, element_type: str, nb_items: int, progress_callback=None):
+        """Traitement asynchrone des X premiers éléments"""
+        
+        async with self._openai_run():
+            progress_labels = {'product': "Produit {i}/{total}"}
+            
+            for item_type, items, fields in self._fetch_for_params(element_type, nb_items):
+                await self._process_items(items, item_type, fields,
+                                          progress_callback, progress_labels.get(item_type))
+        
+        return self.results
+
+    def build_batch_jsonl(self, fetched: List[Tuple[str, List[Dict], Dict]]) -> Tuple[List[bytes], List[Dict]]:
+        """
+        Prépare une requête Batch API par élément (réponse JSON regroupant ses champs),
+        identifiée par "type:id", ou par champ ("type:id:champ") s'il n'y en a qu'un
+        
+        Retourne les lignes JSONL et, par élément, les informations (sérialisables)
+        nécessaires pour reconstruire son résultat à la réception des réponses
+        """
+        lines = []
+        entries = []
+        for item_type, items, fields in fetched:
+            for item in items:
+                item_name = self._item_name(item, item_type)
+                entry_fields = []
+                contexts = {}
                 
-                fields = {
-                    'name': 'Nom du produit',
-                    'description_short': 'Description courte',
-                    'meta_title': 'Meta titre',
-                    'meta_description': 'Meta description'
-                }
+                for field, field_name, original_content, model_content in self._collect_fields(item, item_type, fields):
+                    context = self._prepare_rewrite(model_content, field_name, item_name, item_type)
+                    if context is not None:
+                        contexts[field] = context
+                    entry_fields.append([field, field_name, original_content, context])
                 
-                for i, product in enumerate(products, 1):
-                    if progress_callback:
-                        progress_callback(i, len(products), f"Produit {i}/{len(products)}")
-                    
-                    result = self.process_item(product, 'product', fields)
-                    self.results['products'].append(result)
-                    
-                    if result['has_been_rewritten']:
-                        self.results['metadata']['items_rewritten'] += 1
-                    
-                    time.sleep(0.5)  # Pause pour l'API
+                entry = {'type': item_type, 'id': item.get('id'), 'name': item_name,
+                         'custom_id': None, 'json': len(contexts) > 1, 'fields': entry_fields}
+                
+                if len(contexts) == 1:
+                    (field, context), = contexts.items()
+                    entry['custom_id'] = f"{item_type}:{item.get('id')}:{field}"
+                    body = self._completion_body(context['prompt'], _max_tokens(context['field_type'], context['has_html']))
+                elif contexts:
+                    entry['custom_id'] = f"{item_type}:{item.get('id')}"
+                    body = self._completion_body(
+                        _item_prompt(item_name, item_type, contexts), _item_max_tokens(contexts), json_output=True
+                    )
+                
+                if contexts:
+                    lines.append(orjson.dumps({
+                        "custom_id": entry['custom_id'],
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": body
+                    }))
+                    # Les prompts ne sont plus utiles au post-traitement : inutile de les conserver
+                    for context in contexts.values():
+                        del context['prompt']
+                
+                entries.append(entry)
         
-        if choice in ['2', '4']:  # Catégories
-            categories = self.get_categories(nb_items)
-            if categories:
-                self.results['metadata']['total_categories_analyzed'] = len(categories)
+        return lines, entries
+
+    def submit_batch(self, lines: List[bytes]):
+        """Dépose les requêtes JSONL et crée le batch OpenAI (fenêtre de 24h)"""
+        batch_file = self.openai_client.files.create(
+            file=("fivape_batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        return self.openai_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+
+    def _batch_outputs(self, batch) -> Dict:
+        """
+        Texte (ou erreur) de chaque réponse d'un batch terminé, par custom_id :
+        les requêtes en échec sont lues dans le fichier d'erreurs du batch
+        """
+        file_ids = [file_id for file_id in (batch.output_file_id, batch.error_file_id) if file_id]
+        if not file_ids:
+            # Batch rejeté en bloc (fichier invalide, quota...) : erreurs portées par le batch
+            errors = [error.message for error in (batch.errors.data or [])] if batch.errors else []
+            raise RuntimeError(
+                f"Batch {batch.id} terminé sans résultat (statut : {batch.status})"
+                + (f" : {'; '.join(errors)}" if errors else "")
+            )
+        
+        outputs = {}
+        for file_id in file_ids:
+            for line in self.openai_client.files.content(file_id).content.splitlines():
+                if not line.strip():
+                    continue
                 
-                fields = {
-                    'name': 'Nom de la catégorie',
-                    'description': 'Description',
-                    'additional_description': 'Informations complémentaires',
-                    'meta_title': 'Balise titre',
-                    'meta_description': 'Meta description'
-                }
+                entry = orjson.loads(line)
+                response = entry.get('response') or {}
+                if entry.get('error') or response.get('status_code') != 200:
+                    outputs[entry['custom_id']] = RuntimeError(str(entry.get('error') or response.get('body')))
+                    continue
                 
-                for category in categories:
-                    result = self.process_item(category, 'category', fields)
-                    self.results['categories'].append(result)
-                    
-                    if result['has_been_rewritten']:
-                        self.results['metadata']['items_rewritten'] += 1
+                choice = response['body']['choices'][0]
+                if choice.get('finish_reason') == 'length':
+                    outputs[entry['custom_id']] = TruncatedResponseError("Réponse tronquée")
+                else:
+                    outputs[entry['custom_id']] = choice['message']['content']
         
-        if choice in ['3', '4']:  # Marques
-            manufacturers = self.get_manufacturers(nb_items)
-            if manufacturers:
-                self.results['metadata']['total_manufacturers_analyzed'] = len(manufacturers)
+        return outputs
+
+    def _store_batch_results(self, entries: List[Dict], outputs: Dict):
+        """Réintègre les réponses du batch avec le même post-traitement que le mode direct"""
+        try:
+            for entry in entries:
+                output = outputs.get(entry['custom_id'], RuntimeError("Réponse absente du batch"))
                 
-                fields = {
-                    'name': 'Nom',
-                    'short_description': 'Résumé',
-                    'description': 'Description',
-                    'meta_title': 'Balise titre',
-                    'meta_description': 'Meta description'
-                }
+                # Réponse JSON regroupant les champs de l'élément
+                if entry['json'] and not isinstance(output, Exception):
+                    try:
+                        output = orjson.loads(output)
+                        if not isinstance(output, dict):
+                            raise ValueError("objet JSON attendu")
+                    except ValueError as e:
+                        output = RuntimeError(f"Réponse JSON invalide : {e}")
                 
-                for manufacturer in manufacturers:
-                    result = self.process_item(manufacturer, 'manufacturer', fields)
-                    self.results['manufacturers'].append(result)
+                pending = []
+                outcomes = []
+                for field, field_name, original_content, context in entry['fields']:
+                    pending.append((field, field_name, original_content, None))
                     
-                    if result['has_been_rewritten']:
-                        self.results['metadata']['items_rewritten'] += 1
+                    if context is None:
+                        outcomes.append((original_content, {}))
+                        continue
+                    
+                    rewritten = output.get(field) if isinstance(output, dict) else output
+                    if isinstance(rewritten, Exception):
+                        outcomes.append(rewritten)
+                    elif isinstance(rewritten, str) and rewritten.strip():
+                        outcomes.append(self._finalize_rewrite(rewritten, context))
+                    else:
+                        outcomes.append(RuntimeError("Champ absent de la réponse JSON"))
+                
+                self._store_result(entry['type'], self._build_result(
+                    {'id': entry['id']}, entry['type'], entry['name'], pending, outcomes
+                ))
+        finally:
+            self.close()
+
+    def run_with_params_batch(self, element_type: str, nb_items: int, progress_callback=None,
+                              poll_interval: int = 60):
+        """
+        Version Batch API OpenAI de run_with_params (traitement différé sous 24h, coût -50%)
+        """
+        lines, entries = self.build_batch_jsonl(self._fetch_for_params(element_type, nb_items))
+        outputs = self._run_batch(lines, progress_callback, poll_interval) if lines else {}
+        self._store_batch_results(entries, outputs)
         
         return self.results
 
-    def run_with_specific_ids(self, element_type: str, specific_ids: List[int], progress_callback=None):
-        """Version pour traiter des IDs spécifiques"""
+    def _run_batch(self, lines: List[bytes], progress_callback=None, poll_interval: int = 60) -> Dict:
+        """
+        Soumet des requêtes JSONL à la Batch API, attend la fin du batch
+        et retourne le texte (ou l'erreur) de chaque réponse par custom_id
+        """
+        batch = self.submit_batch(lines)
         
-        # Mapping des types
-        type_map = {
-            "Produits": "products",
-            "Catégories": "categories",
-            "Marques": "manufacturers"
+        while batch.status not in BATCH_FINAL_STATUSES:
+            time.sleep(poll_interval)
+            batch = self.openai_client.batches.retrieve(batch.id)
+            
+            if progress_callback and batch.request_counts:
+                progress_callback(
+                    batch.request_counts.completed,
+                    batch.request_counts.total or len(lines),
+                    f"Batch {batch.status}"
+                )
+        
+        return self._batch_outputs(batch)
+
+    def start_batch(self, element_type: str, nb_items: int) -> Dict:
+        """
+        Soumet le batch de run_with_params_batch sans attendre sa fin
+        
+        Retourne l'état sérialisable du batch, à conserver (session, disque)
+        pour le reprendre ensuite avec resume_batch
+        """
+        lines, entries = self.build_batch_jsonl(self._fetch_for_params(element_type, nb_items))
+        if not lines:
+            raise RuntimeError("Aucun contenu à réécrire")
+        
+        batch = self.submit_batch(lines)
+        return {
+            'batch_id': batch.id,
+            'requests': len(lines),
+            'entries': entries,
+            'metadata': self.results['metadata']
         }
+
+    def resume_batch(self, pending_batch: Dict):
+        """
+        Interroge un batch soumis par start_batch : retourne le batch et,
+        s'il est terminé, les résultats reconstruits (None sinon)
+        """
+        batch = self.openai_client.batches.retrieve(pending_batch['batch_id'])
+        if batch.status not in BATCH_FINAL_STATUSES:
+            return batch, None
         
-        item_type = type_map.get(element_type, "products")
+        self.results['metadata'].update(pending_batch['metadata'])
+        self._store_batch_results(pending_batch['entries'], self._batch_outputs(batch))
+        return batch, self.results
+
+    def cancel_batch(self, batch_id: str):
+        """
+        Annule un batch OpenAI encore en cours ; sans effet s'il est déjà terminé
+        ou inconnu d'OpenAI (None)
+        """
+        try:
+            batch = self.openai_client.batches.retrieve(batch_id)
+        except openai.NotFoundError:
+            return None
+        if batch.status in BATCH_FINAL_STATUSES or batch.status == 'cancelling':
+            return batch
+        return self.openai_client.batches.cancel(batch_id)
+
+    def run_with_specific_ids(self, element_type: str, specific_ids: List[int], progress_callback=None):
+        """Version pour traiter des IDs spécifiques"""
+        return asyncio.run(self.run_with_specific_ids_async(element_type, specific_ids, progress_callback))
+
+    async def run_with_specific_ids_async(self, element_type: str, specific_ids: List[int],
+                                          progress_callback=None):
+        """Traitement asynchrone d'IDs spécifiques"""
         
-        # Récupérer les éléments par IDs
-        if item_type == "products":
-            items = []
-            for i, product_id in enumerate(specific_ids, 1):
-                if progress_callback:
-                    progress_callback(i, len(specific_ids), f"Récupération produit {product_id}")
-                
-                try:
-                    detail_url = f"{self.prestashop_url}/api/products/{product_id}"
-                    detail_response = requests.get(
-                        detail_url,
-                        auth=HTTPBasicAuth(self.prestashop_key, ''),
-                        params={'output_format': 'JSON'},
-                        verify=True
-                    )
-                    
-                    if detail_response.status_code == 200:
-                        product = detail_response.json().get('product', {})
-                        items.append(product)
-                except:
-                    continue
+        async with self._openai_run():
+            # Mapping des types
+            type_map = {
+                "Produits": "products",
+                "Catégories": "categories",
+                "Marques": "manufacturers"
+            }
             
-            if items:
-                self.results['metadata']['total_products_analyzed'] = len(items)
-                
-                fields = {
-                    'name': 'Nom du produit',
-                    'description_short': 'Description courte',
-                    'meta_title': 'Meta titre',
-                    'meta_description': 'Meta description'
-                }
+            item_type = type_map.get(element_type, "products")
+            
+            # Récupérer les éléments par IDs
+            if item_type == "products":
+                items = await self._fetch_by_ids(
+                    'products', 'product', specific_ids, progress_callback, "Récupération produit {id}"
+                )
                 
-                for i, product in enumerate(items, 1):
-                    if progress_callback:
-                        progress_callback(i, len(items), f"Traitement produit {product.get('id')}")
-                    
-                    result = self.process_item(product, 'product', fields)
-                    self.results['products'].append(result)
+                if items:
+                    self.results['metadata']['total_products_analyzed'] = len(items)
                     
-                    if result['has_been_rewritten']:
-                        self.results['metadata']['items_rewritten'] += 1
-                    
-                    time.sleep(0.5)  # Pause pour l'API
-        
-        elif item_type == "categories":
-            items = []
-            for i, category_id in enumerate(specific_ids, 1):
-                if progress_callback:
-                    progress_callback(i, len(specific_ids), f"Récupération catégorie {category_id}")
-                
-                try:
-                    detail_url = f"{self.prestashop_url}/api/categories/{category_id}"
-                    detail_response = requests.get(
-                        detail_url,
-                        auth=HTTPBasicAuth(self.prestashop_key, ''),
-                        params={'output_format': 'JSON'},
-                        verify=True
-                    )
+                    fields = {
+                        'name': 'Nom du produit',
+                        'description_short': 'Description courte',
+                        'meta_title': 'Meta titre',
+                        'meta_description': 'Meta description'
+                    }
                     
-                    if detail_response.status_code == 200:
-                        category = detail_response.json().get('category', {})
-                        items.append(category)
-                except:
-                    continue
+                    await self._process_items(items, 'product', fields,
+                                              progress_callback, "Traitement produit {id}")
             
-            if items:
-                self.results['metadata']['total_categories_analyzed'] = len(items)
-                
-                fields = {
-                    'name': 'Nom de la catégorie',
-                    'description': 'Description',
-                    'additional_description': 'Informations complémentaires',
-                    'meta_title': 'Balise titre',
-                    'meta_description': 'Meta description'
-                }
+            elif item_type == "categories":
+                items = await self._fetch_by_ids(
+                    'categories', 'category', specific_ids, progress_callback, "Récupération catégorie {id}"
+                )
                 
-                for category in items:
-                    result = self.process_item(category, 'category', fields)
-                    self.results['categories'].append(result)
+                if items:
+                    self.results['metadata']['total_categories_analyzed'] = len(items)
                     
-                    if result['has_been_rewritten']:
-                        self.results['metadata']['items_rewritten'] += 1
-        
-        elif item_type == "manufacturers":
-            items = []
-            for i, manufacturer_id in enumerate(specific_ids, 1):
-                if progress_callback:
-                    progress_callback(i, len(specific_ids), f"Récupération marque {manufacturer_id}")
-                
-                try:
-                    detail_url = f"{self.prestashop_url}/api/manufacturers/{manufacturer_id}"
-                    detail_response = requests.get(
-                        detail_url,
-                        auth=HTTPBasicAuth(self.prestashop_key, ''),
-                        params={'output_format': 'JSON'},
-                        verify=True
-                    )
+                    fields = {
+                        'name': 'Nom de la catégorie',
+                        'description': 'Description',
+                        'additional_description': 'Informations complémentaires',
+                        'meta_title': 'Balise titre',
+                        'meta_description': 'Meta description'
+                    }
                     
-                    if detail_response.status_code == 200:
-                        manufacturer = detail_response.json().get('manufacturer', {})
-                        items.append(manufacturer)
-                except:
-                    continue
+                    await self._process_items(items, 'category', fields)
             
-            if items:
-                self.results['metadata']['total_manufacturers_analyzed'] = len(items)
-                
-                fields = {
-                    'name': 'Nom',
-                    'short_description': 'Résumé',
-                    'description': 'Description',
-                    'meta_title': 'Balise titre',
-                    'meta_description': 'Meta description'
-                }
+            elif item_type == "manufacturers":
+                items = await self._fetch_by_ids(
+                    'manufacturers', 'manufacturer', specific_ids, progress_callback, "Récupération marque {id}"
+                )
                 
-                for manufacturer in items:
-                    result = self.process_item(manufacturer, 'manufacturer', fields)
-                    self.results['manufacturers'].append(result)
+                if items:
+                    self.results['metadata']['total_manufacturers_analyzed'] = len(items)
                     
-                    if result['has_been_rewritten']:
-                        self.results['metadata']['items_rewritten'] += 1
+                    fields = {
+                        'name': 'Nom',
+                        'short_description': 'Résumé',
+                        'description': 'Description',
+                        'meta_title': 'Balise titre',
+                        'meta_description': 'Meta description'
+                    }
+                    
+                    await self._process_items(items, 'manufacturer', fields)
         
-        return self.results
\ No newline at end of file
+        return self.results
@@ -1,13 +1,21 @@
 import streamlit as st
-import json
-import time
+import asyncio
+import gzip
+import html
 from datetime import datetime
 import os
+import re
+import tempfile
+import time
+import uuid
+from collections import Counter
+from typing import Final
+import orjson
 import pandas as pd
 
 # Import sécurisé du module
 try:
-    from prestashop_seo_rewriter import PrestashopSEORewriter
+    from prestashop_seo_rewriter import PrestashopSEORewriter, SharedClients, ValidatedItem, results_from_dict, text_only
 except ImportError:
     st.error("Le module prestashop_seo_rewriter n'est pas trouvé. Assurez-vous que le fichier est présent.")
     st.stop()
@@ -21,7 +29,10 @@ st.set_page_config(
 )
 
 # CSS personnalisé corrigé
-st.markdown("""
+@st.cache_resource
+def _css():
+    """Feuille de style de l'application, construite une seule fois par processus"""
+    return """
 <style>
     /* Enlever les contours rouges des boutons */
     .stButton > button {
@@ -73,8 +84,208 @@ st.markdown("""
         border-color: #4CAF50 !important;
         box-shadow: none !important;
     }
+    
+    /* Comparaison avant/après d'une réécriture */
+    .rewrite-stats {
+        background-color: #e8f0fe;
+        padding: 8px 12px;
+        border-radius: 5px;
+        margin-bottom: 6px;
+    }
+    .rewrite-keywords {
+        color: #6b6f76;
+        font-size: 0.875rem;
+        margin-bottom: 6px;
+    }
+    .rewrite-row {
+        display: flex;
+        gap: 1rem;
+    }
+    .rewrite-col {
+        flex: 1;
+        min-width: 0;
+    }
+    .rewrite-box {
+        background-color: white;
+        color: black;
+        padding: 10px;
+        border: 1px solid #ddd;
+        border-radius: 5px;
+        min-height: 100px;
+    }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(_css(), unsafe_allow_html=True)
+
+# Horodatage des noms de fichiers exportés
+FILE_STAMP_FORMAT: Final[str] = '%Y%m%d_%H%M%S'
+
+# Textes statiques de la page, créés une seule fois à l'import
+_GUIDE_MD: Final[str] = """
+### Comment utiliser l'application :
+
+1. **Connexion** : Entrez le mot de passe dans le menu latéral
+2. **Sélection** : 
+   - **Par nombre** : Traite les X premiers éléments
+   - **Par IDs** : Traite des IDs spécifiques (ex: 424,425 ou 424-430)
+3. **Lancement** : Cliquez sur "Lancer la réécriture"
+4. **Validation** : Examinez les résultats et validez les éléments conformes
+5. **Export** : Téléchargez les données validées pour PrestaShop
+
+### Formats d'IDs acceptés :
+- IDs individuels : `424,425,426`
+- Plages d'IDs : `424-430`
+- Combinaison : `424-430,435,440-445`
+
+### Conformité FIVAPE :
+- Suppression automatique des termes promotionnels
+- Conservation des informations techniques uniquement
+- Optimisation SEO avec mots-clés neutres
+"""
+
+_FOOTER_HTML: Final[str] = """
+<div style='text-align: center; color: #888;'>
+    SEO Rewriter v1.0 - Le Vapoteur Discount | 
+    Conformité FIVAPE | 
+    Optimisation SEO
+</div>
+"""
+
+@st.fragment
+def render_guide():
+    """Guide d'utilisation, isolé dans un fragment"""
+    with st.expander("📖 Guide d'utilisation"):
+        st.markdown(_GUIDE_MD)
+
+@st.fragment
+def render_footer():
+    """Pied de page, isolé dans un fragment"""
+    st.markdown("---")
+    st.html(_FOOTER_HTML)
+
+# Dossier de l'application : les fichiers d'état n'y dépendent pas du répertoire courant
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Batch OpenAI en attente, conservé sur disque pour survivre à un redémarrage
+BATCH_STATE_PATH = os.path.join(APP_DIR, ".fivape_batch.json")
+
+def load_pending_batch():
+    """Relit le batch en attente enregistré sur disque (None s'il n'y en a pas)"""
+    try:
+        with open(BATCH_STATE_PATH, 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+def save_pending_batch(pending_batch):
+    """Enregistre (ou efface si None) le batch en attente"""
+    st.session_state.pending_batch = pending_batch
+    if pending_batch is None:
+        if os.path.exists(BATCH_STATE_PATH):
+            os.remove(BATCH_STATE_PATH)
+        return
+    with open(BATCH_STATE_PATH, 'wb') as f:
+        f.write(orjson.dumps(pending_batch))
+
+def remove_older_than(directory, max_age, prefix=''):
+    """Supprime les fichiers d'un dossier (commençant par prefix) plus anciens que max_age secondes"""
+    cutoff = time.time() - max_age
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            try:
+                if (entry.name.startswith(prefix) and entry.is_file()
+                        and entry.stat().st_mtime < cutoff):
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+# Instantané compressé des résultats et validations, retrouvé après un rafraîchissement de la page
+SNAPSHOT_ID_RE = re.compile(r'[0-9a-f]{32}')
+SNAPSHOT_PREFIX = "fivape_"
+SNAPSHOT_TTL_SECONDS = 24 * 3600
+
+def snapshot_path():
+    """Fichier d'instantané de la session, identifiée par un paramètre d'URL stable"""
+    snapshot_id = st.query_params.get("session")
+    if not snapshot_id or not SNAPSHOT_ID_RE.fullmatch(snapshot_id):
+        snapshot_id = uuid.uuid4().hex
+        st.query_params["session"] = snapshot_id
+    return os.path.join(tempfile.gettempdir(), f"{SNAPSHOT_PREFIX}{snapshot_id}.json.gz")
+
+def save_snapshot():
+    """Enregistre les résultats et validations de la session (gzip + orjson, lisible du seul propriétaire)"""
+    try:
+        fd = os.open(snapshot_path(), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # Le mode d'os.open ne s'applique qu'à la création : corriger un fichier plus ancien
+        os.fchmod(fd, 0o600)
+        with open(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb') as f:
+            f.write(orjson.dumps({
+                'results': st.session_state.results,
+                'validations': st.session_state.validations
+            }))
+    except OSError as e:
+        st.warning(f"⚠️ Sauvegarde de la session impossible : {e}")
+
+def load_snapshot():
+    """
+    Relit l'instantané de la session, résultats reconvertis en Item (None s'il n'y en a pas)
+    
+    Un instantané illisible ou d'un format antérieur est supprimé
+    """
+    try:
+        with gzip.open(snapshot_path(), 'rb') as f:
+            snapshot = orjson.loads(f.read())
+    except (OSError, EOFError, orjson.JSONDecodeError):
+        return None
+    
+    try:
+        results = snapshot.get('results')
+        return {
+            'results': results_from_dict(results) if results else None,
+            'validations': snapshot.get('validations') or {}
+        }
+    except (TypeError, KeyError, AttributeError):
+        delete_snapshot()
+        return None
+
+def delete_snapshot():
+    """Supprime l'instantané de la session"""
+    path = snapshot_path()
+    if os.path.exists(path):
+        os.remove(path)
+
+# Exports PrestaShop servis par le point statique de Streamlit (server.enableStaticServing)
+EXPORT_DIR = os.path.join(APP_DIR, "static", "exports")
+EXPORT_TTL_SECONDS = 3600
+
+def publish_export(payload, prefix, extension):
+    """Écrit un export dans le dossier statique et renvoie son nom de fichier"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    name = f"{prefix}_{uuid.uuid4().hex}{extension}"
+    with open(os.path.join(EXPORT_DIR, name), 'wb') as f:
+        f.write(payload)
+    return name
+
+@st.cache_resource(ttl=EXPORT_TTL_SECONDS, show_spinner=False)
+def sweep_exports():
+    """Supprime les exports de plus d'une heure (au démarrage, puis au plus une fois par heure)"""
+    remove_older_than(EXPORT_DIR, EXPORT_TTL_SECONDS)
+
+@st.cache_resource(ttl=EXPORT_TTL_SECONDS, show_spinner=False)
+def sweep_snapshots():
+    """
+    Supprime les instantanés des sessions abandonnées (non enregistrés depuis 24h),
+    au démarrage puis au plus une fois par heure
+    """
+    remove_older_than(tempfile.gettempdir(), SNAPSHOT_TTL_SECONDS, prefix=SNAPSHOT_PREFIX)
+
+sweep_exports()
+sweep_snapshots()
 
 # Initialisation session state
 if 'results' not in st.session_state:
@@ -89,9 +300,32 @@ if 'specific_ids' not in st.session_state:
     st.session_state.specific_ids = None
 if 'nb_to_process' not in st.session_state:
     st.session_state.nb_to_process = 5
+if 'use_batch' not in st.session_state:
+    st.session_state.use_batch = False
+if 'pending_batch' not in st.session_state:
+    st.session_state.pending_batch = load_pending_batch()
+if 'batch_status' not in st.session_state:
+    st.session_state.batch_status = None
 
-def get_api_keys():
-    """Récupère les clés API de manière sécurisée"""
+# Notification laissée par l'exécution précédente (avant st.rerun)
+if st.session_state.get('toast'):
+    st.toast(st.session_state.pop('toast'))
+
+# Restauration après un rafraîchissement ou un redémarrage
+if st.session_state.results is None and not st.session_state.validations:
+    snapshot = load_snapshot()
+    if snapshot:
+        st.session_state.results = snapshot['results']
+        st.session_state.validations = snapshot['validations']
+
+@st.cache_resource
+def _load_api_keys_cached():
+    """
+    Lit une seule fois par processus les clés API (secrets Streamlit puis .env)
+    
+    Lève RuntimeError si elles sont absentes : l'échec n'est pas mis en cache,
+    les clés ajoutées ensuite sont lues au rerun suivant
+    """
     try:
         # Production - Streamlit Secrets
         return {
@@ -119,24 +353,53 @@ def get_api_keys():
         except:
             pass
         
-        # Dernier recours - Saisie manuelle
-        st.warning("⚠️ Clés API non configurées dans les secrets")
-        with st.expander("Configuration manuelle (développement uniquement)"):
-            col1, col2 = st.columns(2)
-            with col1:
-                prestashop = st.text_input("Clé API PrestaShop", type="password", key="manual_prestashop")
-            with col2:
-                openai = st.text_input("Clé API OpenAI", type="password", key="manual_openai")
-            
-            if prestashop and openai:
-                return {
-                    'prestashop': prestashop,
-                    'openai': openai,
-                    'password': 'admin',
-                    'url': 'https://www.levapoteur-discount.fr'
-                }
+        raise RuntimeError("Clés API non configurées")
+
+def get_api_keys():
+    """Récupère les clés API de manière sécurisée"""
+    try:
+        return _load_api_keys_cached()
+    except RuntimeError:
+        pass
+    
+    # Dernier recours - Saisie manuelle (widgets : hors de la fonction mise en cache)
+    st.warning("⚠️ Clés API non configurées dans les secrets")
+    with st.expander("Configuration manuelle (développement uniquement)"):
+        col1, col2 = st.columns(2)
+        with col1:
+            prestashop = st.text_input("Clé API PrestaShop", type="password", key="manual_prestashop")
+        with col2:
+            openai = st.text_input("Clé API OpenAI", type="password", key="manual_openai")
         
-        return None
+        if prestashop and openai:
+            return {
+                'prestashop': prestashop,
+                'openai': openai,
+                'password': 'admin',
+                'url': 'https://www.levapoteur-discount.fr'
+            }
+    
+    return None
+
+@st.cache_resource
+def get_shared_clients(prestashop_key, openai_key):
+    """Connexions (session PrestaShop, client OpenAI) et quotas, partagés entre reruns et sessions"""
+    return SharedClients.create(prestashop_key, openai_key)
+
+def get_rewriter(url, prestashop_key, openai_key):
+    """Rewriter neuf pour une exécution (résultats propres), sur les connexions partagées"""
+    return PrestashopSEORewriter(
+        prestashop_url=url,
+        prestashop_key=prestashop_key,
+        openai_api_key=openai_key,
+        clients=get_shared_clients(prestashop_key, openai_key)
+    )
+
+# Grammaire des IDs, compilée une seule fois : un ID ou une plage ("424" ou "424-430"),
+# séparés par des virgules ou des espaces ("1 - 10" reste une plage)
+_ID_RANGE_RE = re.compile(r'(\d+)(?:-(\d+))?')
+_ID_SEPARATOR_RE = re.compile(r'[\s,]+')
+_RANGE_DASH_RE = re.compile(r'\s*-\s*')
 
 def parse_id_input(id_input):
     """Parse l'entrée des IDs (ex: '1,2,3' ou '1-10' ou '1-10,15,20-25')"""
@@ -144,24 +407,71 @@ def parse_id_input(id_input):
         return []
     
     ids = []
-    parts = id_input.replace(' ', '').split(',')
+    invalid = []
+    parts = [part for part in _ID_SEPARATOR_RE.split(_RANGE_DASH_RE.sub('-', id_input.strip())) if part]
     
     for part in parts:
-        if '-' in part:
-            # Range d'IDs
-            try:
-                start, end = part.split('-')
-                ids.extend(range(int(start), int(end) + 1))
-            except:
-                st.warning(f"Format invalide : {part}")
-        else:
-            # ID unique
-            try:
-                ids.append(int(part))
-            except:
-                st.warning(f"ID invalide : {part}")
+        match = _ID_RANGE_RE.fullmatch(part)
+        if match is None:
+            invalid.append(part)
+            continue
+        start, end = match.groups()
+        # ID unique ou range d'IDs
+        ids.extend(range(int(start), int(end or start) + 1))
     
-    return list(set(ids))  # Enlever les doublons
+    # Un seul avertissement, quel que soit le nombre d'entrées invalides
+    if invalid:
+        st.warning(f"⚠️ {len(invalid)} entrée(s) ignorée(s) : {', '.join(invalid[:5])}{' ...' if len(invalid) > 5 else ''}")
+    
+    return sorted(dict.fromkeys(ids))  # Enlever les doublons, ordre stable
+
+# Caches partagés entre sessions : bornés en nombre d'entrées et en durée de vie
+CACHE_MAX_ENTRIES = 16
+CACHE_TTL_SECONDS = 3600
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def build_validation_artifacts(validations_tuple):
+    """Tableau des validations et ses exports CSV/JSON (recalculés seulement si les validations changent)"""
+    df_data = []
+    for key, validation in validations_tuple:
+        df_data.append({
+            'Type': validation.get('type', ''),
+            'ID': validation.get('id', ''),
+            'Nom': validation.get('name', '')[:50],
+            'Validateur': validation.get('validator', ''),
+            'Date': validation.get('timestamp', '')[:10]
+        })
+    
+    df = pd.DataFrame(df_data)
+    # orjson : toujours en UTF-8, remplace le chemin lent de json.dumps(ensure_ascii=False)
+    return df, df.to_csv(index=False), orjson.dumps(dict(validations_tuple), option=orjson.OPT_INDENT_2)
+
+def results_key(results):
+    """Identifiant d'une exécution, utilisé comme clé de cache à la place des résultats eux-mêmes"""
+    return (
+        results['metadata'].get('date'),
+        len(results.get('products', [])),
+        len(results.get('categories', [])),
+        len(results.get('manufacturers', []))
+    )
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def serialize_results(run_key, _results, pretty=False):
+    """Export JSON des résultats (compact par défaut), calculé une fois par exécution"""
+    return orjson.dumps(_results, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+def aggregate_keywords(run_key, _products):
+    """
+    Occurrences des mots-clés SEO sur l'ensemble des réécritures produits
+    (run_key identifie l'exécution : la liste des produits n'est pas hachée)
+    """
+    total_keywords = Counter()
+    for product in _products:
+        for rewrite in product.rewrites:
+            total_keywords.update({k: v for k, v in rewrite.keywords.items() if v > 0})
+    
+    return pd.DataFrame(total_keywords.most_common(), columns=['Mot-clé', 'Occurrences'])
 
 # Header
 st.title("🚀 Réécriture SEO PrestaShop - Conformité FIVAPE")
@@ -192,6 +502,7 @@ with st.sidebar:
             st.session_state.authenticated = False
             st.session_state.results = None
             st.session_state.validations = {}
+            delete_snapshot()
             st.rerun()
         
         st.markdown("---")
@@ -210,64 +521,84 @@ with st.sidebar:
             key="element_type"
         )
         
-        if selection_mode == "Par nombre":
-            nb_elements = st.number_input(
-                "Nombre d'éléments",
-                min_value=1,
-                max_value=100,
-                value=5,
-                key="nb_elements",
-                help="Nombre d'éléments à traiter (limité à 100)"
-            )
-            specific_ids = None
-        else:
-            st.markdown("### Saisir les IDs")
-            st.caption("Formats acceptés : '1,2,3' ou '1-10' ou '1-10,15,20-25'")
-            
-            if element_type == "Produits":
-                id_input = st.text_input(
-                    "IDs des produits",
-                    placeholder="Ex: 424,425,426 ou 424-430",
-                    key="product_ids"
-                )
-            elif element_type == "Catégories":
-                id_input = st.text_input(
-                    "IDs des catégories",
-                    placeholder="Ex: 1,2,3 ou 1-10",
-                    key="category_ids"
+        # Paramètres de lancement regroupés : une seule exécution du script à la validation
+        with st.form("launch_form"):
+            if selection_mode == "Par nombre":
+                nb_elements = st.number_input(
+                    "Nombre d'éléments",
+                    min_value=1,
+                    max_value=100,
+                    value=5,
+                    key="nb_elements",
+                    help="Nombre d'éléments à traiter (limité à 100)"
                 )
+                id_input = None
             else:
-                id_input = st.text_input(
-                    "IDs des marques",
-                    placeholder="Ex: 1,2,3 ou 1-5",
-                    key="manufacturer_ids"
-                )
-            
-            specific_ids = parse_id_input(id_input)
+                st.markdown("### Saisir les IDs")
+                st.caption("Formats acceptés : '1,2,3' ou '1-10' ou '1-10,15,20-25'")
+                
+                if element_type == "Produits":
+                    id_input = st.text_input(
+                        "IDs des produits",
+                        placeholder="Ex: 424,425,426 ou 424-430",
+                        key="product_ids"
+                    )
+                elif element_type == "Catégories":
+                    id_input = st.text_input(
+                        "IDs des catégories",
+                        placeholder="Ex: 1,2,3 ou 1-10",
+                        key="category_ids"
+                    )
+                else:
+                    id_input = st.text_input(
+                        "IDs des marques",
+                        placeholder="Ex: 1,2,3 ou 1-5",
+                        key="manufacturer_ids"
+                    )
+                
+                nb_elements = None
             
-            if specific_ids:
-                st.info(f"📌 {len(specific_ids)} IDs sélectionnés : {', '.join(map(str, specific_ids[:10]))}{' ...' if len(specific_ids) > 10 else ''}")
+            # Batch API OpenAI : résultats sous 24h, coût divisé par deux
+            batch_mode = st.checkbox(
+                "Mode batch (24h, –50%)",
+                key="batch_mode",
+                disabled=selection_mode != "Par nombre",
+                help="Disponible en mode « Par nombre » ; reprendre le batch depuis le panneau « Statut batch »"
+            )
             
-            nb_elements = None
+            # Bouton de lancement
+            submitted = st.form_submit_button(
+                "🚀 Lancer la réécriture",
+                type="primary",
+                disabled=st.session_state.processing
+            )
+        
+        # IDs saisis (valeur prise en compte à la validation du formulaire)
+        specific_ids = parse_id_input(id_input) if id_input is not None else None
+        
+        if specific_ids:
+            st.info(f"📌 {len(specific_ids)} IDs sélectionnés : {', '.join(map(str, specific_ids[:10]))}{' ...' if len(specific_ids) > 10 else ''}")
         
         st.markdown("---")
         
-        # Bouton de lancement
-        if not st.session_state.processing:
-            if st.button("🚀 Lancer la réécriture", type="primary", key="launch_btn"):
-                api_keys = get_api_keys()
-                
-                if not api_keys:
-                    st.error("❌ Veuillez configurer les clés API")
-                elif selection_mode == "Par IDs spécifiques" and not specific_ids:
-                    st.error("❌ Veuillez saisir au moins un ID")
-                else:
-                    st.session_state.processing = True
-                    st.session_state.specific_ids = specific_ids
-                    st.session_state.nb_to_process = nb_elements
-                    st.rerun()
-        else:
+        if st.session_state.processing:
             st.info("⏳ Traitement en cours...")
+        elif submitted:
+            api_keys = get_api_keys()
+            use_batch = batch_mode and selection_mode == "Par nombre"
+            
+            if not api_keys:
+                st.error("❌ Veuillez configurer les clés API")
+            elif selection_mode == "Par IDs spécifiques" and not specific_ids:
+                st.error("❌ Veuillez saisir au moins un ID")
+            elif use_batch and st.session_state.pending_batch:
+                st.error("❌ Un batch est déjà en attente")
+            else:
+                st.session_state.processing = True
+                st.session_state.specific_ids = specific_ids
+                st.session_state.nb_to_process = nb_elements
+                st.session_state.use_batch = use_batch
+                st.rerun()
         
         # Statistiques dans la sidebar
         if st.session_state.results:
@@ -290,6 +621,73 @@ with st.sidebar:
 # Zone principale
 if st.session_state.authenticated:
     
+    # Batch OpenAI en attente
+    if st.session_state.pending_batch and not st.session_state.processing:
+        pending_batch = st.session_state.pending_batch
+        
+        st.subheader("🕒 Statut batch")
+        st.caption(f"Batch {pending_batch['batch_id']} : {pending_batch['requests']} requêtes soumises")
+        
+        batch_status = st.session_state.batch_status
+        if batch_status:
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Statut", batch_status['status'])
+            col2.metric("Terminées", batch_status['completed'])
+            col3.metric("En échec", batch_status['failed'])
+            col4.metric("Total", batch_status['total'])
+        
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            resume_clicked = st.button("🔄 Reprendre batch", key="resume_batch_btn")
+        with col2:
+            cancel_clicked = st.button("🛑 Annuler ce batch", key="cancel_batch_btn")
+        
+        if resume_clicked:
+            api_keys = get_api_keys()
+            
+            if not api_keys:
+                st.error("❌ Les clés API ne sont pas configurées")
+            else:
+                try:
+                    rewriter = get_rewriter(api_keys['url'], api_keys['prestashop'], api_keys['openai'])
+                    batch, results = rewriter.resume_batch(pending_batch)
+                    
+                    counts = batch.request_counts
+                    st.session_state.batch_status = {
+                        'status': batch.status,
+                        'completed': counts.completed if counts else 0,
+                        'failed': counts.failed if counts else 0,
+                        'total': counts.total if counts else pending_batch['requests']
+                    }
+                    
+                    if results:
+                        st.session_state.results = results
+                        save_snapshot()
+                        save_pending_batch(None)
+                    st.rerun()
+                    
+                except Exception as e:
+                    st.error(f"❌ Erreur lors de la reprise du batch : {str(e)}")
+        
+        if cancel_clicked:
+            api_keys = get_api_keys()
+            
+            if not api_keys:
+                st.error("❌ Les clés API ne sont pas configurées")
+            else:
+                try:
+                    # Annulé côté OpenAI (plus facturé), puis oublié localement
+                    rewriter = get_rewriter(api_keys['url'], api_keys['prestashop'], api_keys['openai'])
+                    rewriter.cancel_batch(pending_batch['batch_id'])
+                    save_pending_batch(None)
+                    st.session_state.batch_status = None
+                    st.rerun()
+                    
+                except Exception as e:
+                    st.error(f"❌ Erreur lors de l'annulation du batch : {str(e)}")
+        
+        st.markdown("---")
+    
     # Traitement en cours
     if st.session_state.processing:
         api_keys = get_api_keys()
@@ -304,14 +702,10 @@ if st.session_state.authenticated:
             try:
                 status_text.text("Initialisation...")
                 
-                # Créer l'instance du rewriter
-                rewriter = PrestashopSEORewriter(
-                    prestashop_url=api_keys['url'],
-                    prestashop_key=api_keys['prestashop'],
-                    openai_api_key=api_keys['openai']
-                )
+                # Instance propre à cette exécution (connexions et quotas partagés)
+                rewriter = get_rewriter(api_keys['url'], api_keys['prestashop'], api_keys['openai'])
                 
-                # Callback pour la progression
+                # Callback pour la progression (appelé depuis la boucle d'événements, dans ce thread)
                 def update_progress(current, total, message):
                     if total > 0:
                         progress = current / total
@@ -324,27 +718,38 @@ if st.session_state.authenticated:
                 # Lancer le traitement selon le mode
                 if st.session_state.specific_ids:
                     # Mode IDs spécifiques
-                    results = rewriter.run_with_specific_ids(
+                    results = asyncio.run(rewriter.run_with_specific_ids_async(
                         element_type=st.session_state.element_type,
                         specific_ids=st.session_state.specific_ids,
                         progress_callback=update_progress
+                    ))
+                elif st.session_state.use_batch:
+                    # Mode batch : soumission sans attente, reprise via le panneau "Statut batch"
+                    status_text.text("Soumission du batch OpenAI...")
+                    pending_batch = rewriter.start_batch(
+                        element_type=st.session_state.element_type,
+                        nb_items=st.session_state.nb_to_process
                     )
+                    save_pending_batch(pending_batch)
+                    st.session_state.batch_status = None
+                    st.session_state.processing = False
+                    st.rerun()
                 else:
                     # Mode par nombre
-                    results = rewriter.run_with_params(
+                    results = asyncio.run(rewriter.run_with_params_async(
                         element_type=st.session_state.element_type,
                         nb_items=st.session_state.nb_to_process,
                         progress_callback=update_progress
-                    )
-                
+                    ))
+            
                 # Vérifier et stocker les résultats
                 if results:
                     st.session_state.results = results
                     st.session_state.processing = False
+                    save_snapshot()
                     
-                    progress_bar.progress(1.0)
-                    status_text.text("✅ Traitement terminé!")
-                    time.sleep(1)
+                    # Notification affichée à l'exécution suivante, sans bloquer le script
+                    st.session_state.toast = "✅ Traitement terminé!"
                     st.rerun()
                 else:
                     st.error("❌ Aucun résultat retourné")
@@ -358,10 +763,16 @@ if st.session_state.authenticated:
     # Affichage des résultats
     elif st.session_state.results:
         
-        # Tabs pour organisation
-        tab1, tab2, tab3, tab4 = st.tabs(["📝 Résultats", "✅ Validation", "📊 Analyse", "💾 Export"])
+        # Sélecteur de vue : seule la vue affichée est exécutée (contrairement à st.tabs)
+        view = st.radio(
+            "Vue",
+            ["📝 Résultats", "✅ Validation", "📊 Analyse", "💾 Export"],
+            horizontal=True,
+            label_visibility="collapsed",
+            key="active_view"
+        )
         
-        with tab1:
+        if view == "📝 Résultats":
             st.subheader("📝 Résultats de la réécriture")
             
             # Filtres
@@ -375,122 +786,117 @@ if st.session_state.authenticated:
             
             # Fonction d'affichage améliorée
             def display_items(items, item_type):
-                for item in items:
-                    if item.get('has_been_rewritten'):
-                        # Appliquer les filtres
-                        if search and search.lower() not in item['name'].lower():
-                            continue
-                        
-                        item_key = f"{item_type}_{item['id']}"
-                        is_validated = item_key in st.session_state.validations
-                        
-                        if show_validated and not is_validated:
-                            continue
-                        
-                        # Créer un expander pour chaque item
-                        icon = "✅" if is_validated else "📦" if item_type == "product" else "📁"
+                # Filtres appliqués en une passe, avant tout rendu
+                search_lc = (search or "").lower()
+                validations = st.session_state.validations
+                items_to_render = [
+                    item for item in items
+                    if item.has_been_rewritten
+                    and (not search_lc or search_lc in item.name.lower())
+                    and (not show_validated or f"{item_type}_{item.id}" in validations)
+                ]
+                
+                for item in items_to_render:
+                    item_key = f"{item_type}_{item.id}"
+                    is_validated = item_key in validations
+                    
+                    # Créer un expander pour chaque item
+                    icon = "✅" if is_validated else "📦" if item_type == "product" else "📁"
+                    
+                    with st.expander(
+                        f"{icon} {item_type.capitalize()} {item.id}: {item.name[:60]}...", 
+                        expanded=not is_validated
+                    ):
+                        # Statistiques de l'item
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.metric("Champs réécrits", item.seo_stats['fields_rewritten'])
+                        with col2:
+                            st.metric("Mots-clés ajoutés", item.seo_stats['total_keywords_added'])
+                        with col3:
+                            if is_validated:
+                                validation_info = st.session_state.validations[item_key]
+                                st.success(f"✅ Validé par {validation_info['validator']}")
                         
-                        with st.expander(
-                            f"{icon} {item_type.capitalize()} {item['id']}: {item['name'][:60]}...", 
-                            expanded=not is_validated
-                        ):
-                            # Statistiques de l'item
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric("Champs réécrits", item['seo_stats']['fields_rewritten'])
-                            with col2:
-                                st.metric("Mots-clés ajoutés", item['seo_stats']['total_keywords_added'])
-                            with col3:
-                                if is_validated:
-                                    validation_info = st.session_state.validations[item_key]
-                                    st.success(f"✅ Validé par {validation_info['validator']}")
+                        # Afficher chaque réécriture
+                        for rewrite in item.rewrites:
+                            # Statistiques du champ
+                            is_meta = rewrite.field_name in ['Meta titre', 'Meta description']
+                            if is_meta:
+                                metric_label = "caractères"
+                                original_metric = rewrite.stats.original_length
+                                new_metric = rewrite.stats.new_length
+                            else:
+                                metric_label = "mots"
+                                original_metric = rewrite.stats.original_word_count
+                                new_metric = rewrite.stats.new_word_count
                             
-                            # Afficher chaque réécriture
-                            for rewrite in item['rewrites']:
-                                st.markdown(f"### {rewrite['field_name']}")
-                                
-                                # Statistiques du champ
-                                if rewrite['field_name'] in ['Meta titre', 'Meta description']:
-                                    metric_label = "caractères"
-                                    original_metric = rewrite['stats'].get('original_length', 0)
-                                    new_metric = rewrite['stats'].get('new_length', 0)
-                                else:
-                                    metric_label = "mots"
-                                    original_metric = rewrite['stats'].get('original_word_count', 0)
-                                    new_metric = rewrite['stats'].get('new_word_count', 0)
-                                
-                                st.info(f"📊 {original_metric} → {new_metric} {metric_label}")
-                                
-                                # Mots-clés
-                                if rewrite.get('keywords'):
-                                    keywords_text = " | ".join([
-                                        f"{kw}: {count}x" 
-                                        for kw, count in rewrite['keywords'].items() 
-                                        if count > 0
-                                    ])
-                                    if keywords_text:
-                                        st.caption(f"🔑 Mots-clés : {keywords_text}")
-                                
-                                # Comparaison avant/après avec style amélioré
+                            # Mots-clés
+                            keywords_html = ""
+                            if rewrite.keywords:
+                                keywords_text = " | ".join([
+                                    f"{kw}: {count}x" 
+                                    for kw, count in rewrite.keywords.items() 
+                                    if count > 0
+                                ])
+                                if keywords_text:
+                                    keywords_html = f'<div class="rewrite-keywords">🔑 Mots-clés : {html.escape(keywords_text)}</div>'
+                            
+                            # Titre, statistiques et comparaison avant/après en un seul bloc HTML
+                            st.markdown(
+                                f"""<h3>{html.escape(rewrite.field_name)}</h3>
+<div class="rewrite-stats">📊 {original_metric} → {new_metric} {metric_label}</div>
+{keywords_html}
+<div class="rewrite-row">
+<div class="rewrite-col"><b>⌛ AVANT (Non conforme)</b>
+<div class="rewrite-box">{html.escape(text_only(rewrite.original_content))}</div></div>
+<div class="rewrite-col"><b>✅ APRÈS (Optimisé SEO)</b>
+<div class="rewrite-box">{html.escape(text_only(rewrite.rewritten_content))}</div></div>
+</div>""",
+                                unsafe_allow_html=True
+                            )
+                            
+                            # HTML source des descriptions
+                            if not is_meta:
                                 col1, col2 = st.columns(2)
                                 
                                 with col1:
-                                    st.markdown("**⌛ AVANT (Non conforme)**")
-                                    # Zone de texte avec fond blanc et texte noir
-                                    st.markdown(
-                                        f"""<div style="background-color: white; color: black; padding: 10px; 
-                                        border: 1px solid #ddd; border-radius: 5px; min-height: 100px;">
-                                        {html.escape(rewrite['original_text_only'])}</div>""",
-                                        unsafe_allow_html=True
-                                    )
-                                    
-                                    if rewrite['field_name'] not in ['Meta titre', 'Meta description'] and rewrite.get('original_content'):
+                                    if rewrite.original_content:
                                         with st.expander("Voir le HTML"):
-                                            st.code(rewrite.get('original_content', ''), language='html')
+                                            st.code(rewrite.original_content, language='html')
                                 
                                 with col2:
-                                    st.markdown("**✅ APRÈS (Optimisé SEO)**")
-                                    # Zone de texte avec fond blanc et texte noir
-                                    st.markdown(
-                                        f"""<div style="background-color: white; color: black; padding: 10px; 
-                                        border: 1px solid #ddd; border-radius: 5px; min-height: 100px;">
-                                        {html.escape(rewrite['rewritten_text_only'])}</div>""",
-                                        unsafe_allow_html=True
-                                    )
-                                    
-                                    if rewrite['field_name'] not in ['Meta titre', 'Meta description'] and rewrite.get('rewritten_content'):
+                                    if rewrite.rewritten_content:
                                         with st.expander("Voir le HTML"):
-                                            st.code(rewrite.get('rewritten_content', ''), language='html')
-                            
-                            # Bouton de validation
-                            if not is_validated:
-                                col1, col2, col3 = st.columns([1, 2, 1])
-                                with col2:
-                                    validator_name = st.text_input(
-                                        "Votre nom pour validation",
-                                        key=f"validator_{item['id']}"
-                                    )
-                                    if st.button(
-                                        "✅ Valider cet élément",
-                                        key=f"validate_{item['id']}",
-                                        type="primary"
-                                    ):
-                                        if validator_name:
-                                            st.session_state.validations[item_key] = {
-                                                'validated': True,
-                                                'timestamp': datetime.now().isoformat(),
-                                                'validator': validator_name,
-                                                'id': item['id'],
-                                                'name': item['name'],
-                                                'type': item_type
-                                            }
-                                            st.success("✅ Élément validé!")
-                                            st.rerun()
-                                        else:
-                                            st.error("Veuillez entrer votre nom")
-            
-            # Import html pour escape
-            import html
+                                            st.code(rewrite.rewritten_content, language='html')
+                        
+                        # Bouton de validation
+                        if not is_validated:
+                            col1, col2, col3 = st.columns([1, 2, 1])
+                            with col2:
+                                validator_name = st.text_input(
+                                    "Votre nom pour validation",
+                                    key=f"validator_{item.id}"
+                                )
+                                if st.button(
+                                    "✅ Valider cet élément",
+                                    key=f"validate_{item.id}",
+                                    type="primary"
+                                ):
+                                    if validator_name:
+                                        st.session_state.validations[item_key] = {
+                                            'validated': True,
+                                            'timestamp': datetime.now().isoformat(),
+                                            'validator': validator_name,
+                                            'id': item.id,
+                                            'name': item.name,
+                                            'type': item_type
+                                        }
+                                        save_snapshot()
+                                        st.success("✅ Élément validé!")
+                                        st.rerun()
+                                    else:
+                                        st.error("Veuillez entrer votre nom")
             
             # Afficher selon le filtre
             if show_type in ["Tout", "Produits"]:
@@ -508,7 +914,7 @@ if st.session_state.authenticated:
                     st.markdown("#### 🏷️ Marques")
                     display_items(st.session_state.results['manufacturers'], 'manufacturer')
         
-        with tab2:
+        elif view == "✅ Validation":
             st.subheader("✅ Gestion des validations")
             
             if st.session_state.validations:
@@ -532,49 +938,41 @@ if st.session_state.authenticated:
                 
                 # Tableau des validations
                 if st.session_state.validations:
-                    df_data = []
-                    for key, validation in st.session_state.validations.items():
-                        df_data.append({
-                            'Type': validation.get('type', ''),
-                            'ID': validation.get('id', ''),
-                            'Nom': validation.get('name', '')[:50],
-                            'Validateur': validation.get('validator', ''),
-                            'Date': validation.get('timestamp', '')[:10]
-                        })
-                    
-                    df = pd.DataFrame(df_data)
+                    df, csv, json_data = build_validation_artifacts(
+                        tuple(sorted(st.session_state.validations.items()))
+                    )
                     st.dataframe(df, use_container_width=True)
                     
                     # Actions
+                    stamp = datetime.now().strftime(FILE_STAMP_FORMAT)
                     col1, col2, col3 = st.columns(3)
                     
                     with col1:
-                        json_str = json.dumps(st.session_state.validations, indent=2, ensure_ascii=False)
                         st.download_button(
                             label="💾 Télécharger JSON",
-                            data=json_str,
-                            file_name=f"validations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                            data=json_data,
+                            file_name=f"validations_{stamp}.json",
                             mime="application/json"
                         )
                     
                     with col2:
-                        csv = df.to_csv(index=False)
                         st.download_button(
                             label="📊 Télécharger CSV",
                             data=csv,
-                            file_name=f"validations_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            file_name=f"validations_{stamp}.csv",
                             mime="text/csv"
                         )
                     
                     with col3:
                         if st.button("🗑️ Réinitialiser", key="reset_validations"):
                             st.session_state.validations = {}
+                            save_snapshot()
                             st.success("Validations réinitialisées")
                             st.rerun()
             else:
-                st.info("Aucune validation pour le moment. Validez des éléments dans l'onglet Résultats.")
+                st.info("Aucune validation pour le moment. Validez des éléments dans la vue Résultats.")
         
-        with tab3:
+        elif view == "📊 Analyse":
             st.subheader("📊 Analyse détaillée")
             
             if st.session_state.results:
@@ -635,79 +1033,86 @@ if st.session_state.authenticated:
                 # Analyse des mots-clés
                 st.markdown("### 🔑 Analyse des mots-clés SEO")
                 
-                total_keywords = {}
-                for product in st.session_state.results.get('products', []):
-                    for rewrite in product.get('rewrites', []):
-                        for keyword, count in rewrite.get('keywords', {}).items():
-                            total_keywords[keyword] = total_keywords.get(keyword, 0) + count
+                products = st.session_state.results.get('products', [])
+                df_keywords = aggregate_keywords(results_key(st.session_state.results), products)
                 
-                if total_keywords:
-                    df_keywords = pd.DataFrame(
-                        list(total_keywords.items()),
-                        columns=['Mot-clé', 'Occurrences']
-                    ).sort_values('Occurrences', ascending=False)
-                    
+                if not df_keywords.empty:
                     st.bar_chart(df_keywords.set_index('Mot-clé'))
                 else:
                     st.info("Aucun mot-clé SEO détecté")
         
-        with tab4:
+        elif view == "💾 Export":
             st.subheader("💾 Export des données")
             
+            # Un seul horodatage pour tous les noms de fichiers de la vue
+            stamp = datetime.now().strftime(FILE_STAMP_FORMAT)
+            
             # Export complet
             st.markdown("### 📦 Export complet")
             
             col1, col2 = st.columns(2)
             
             with col1:
-                json_str = json.dumps(st.session_state.results, indent=2, ensure_ascii=False)
                 st.download_button(
                     label="💾 Télécharger résultats JSON",
-                    data=json_str,
-                    file_name=f"resultats_complets_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    data=serialize_results(results_key(st.session_state.results), st.session_state.results),
+                    file_name=f"resultats_complets_{stamp}.json",
+                    mime="application/json"
+                )
+                st.download_button(
+                    label="📄 Télécharger résultats JSON (indenté)",
+                    data=serialize_results(results_key(st.session_state.results), st.session_state.results, pretty=True),
+                    file_name=f"resultats_complets_{stamp}_lisible.json",
                     mime="application/json"
                 )
             
             with col2:
                 # Export pour PrestaShop (validés uniquement)
                 if st.session_state.validations:
-                    validated_items = []
+                    results = st.session_state.results
+                    # Clés (type, id) figées : filtre de l'export et signature de l'export publié
+                    validated_keys = frozenset(
+                        (validation.get('type'), validation.get('id'))
+                        for validation in st.session_state.validations.values()
+                    )
                     
-                    for key, validation in st.session_state.validations.items():
-                        item_type = validation.get('type')
-                        item_id = validation.get('id')
-                        
-                        # Retrouver l'item complet
-                        if item_type == 'product':
-                            items = st.session_state.results.get('products', [])
-                        elif item_type == 'category':
-                            items = st.session_state.results.get('categories', [])
-                        else:
-                            items = st.session_state.results.get('manufacturers', [])
-                        
-                        for item in items:
-                            if item['id'] == item_id:
-                                validated_items.append({
-                                    'type': item_type,
-                                    'id': item_id,
-                                    'name': item['name'],
-                                    'rewrites': item['rewrites']
-                                })
-                                break
+                    # Un export déjà publié reste valable tant que résultats et validations sont inchangés
+                    export_signature = (results_key(results), validated_keys)
+                    published = st.session_state.get('prestashop_export')
                     
-                    export_data = {
-                        'timestamp': datetime.now().isoformat(),
-                        'validated_count': len(validated_items),
-                        'items': validated_items
-                    }
+                    def build_prestashop_export():
+                        """Export JSON Lines des éléments validés, construit seulement à la demande"""
+                        # Une ligne par élément dont la clé (type, id) a été validée, sérialisée
+                        # au fil de l'eau (orjson gère directement les dataclasses)
+                        lines = (
+                            orjson.dumps(
+                                ValidatedItem(item.type, item.id, item.name, item.rewrites),
+                                option=orjson.OPT_APPEND_NEWLINE
+                            )
+                            for key in ('products', 'categories', 'manufacturers')
+                            for item in results.get(key, [])
+                            if (item.type, item.id) in validated_keys
+                        )
+                        # gzip rapide ; mtime=0 rend l'archive reproductible
+                        return gzip.compress(b''.join(lines), compresslevel=1, mtime=0)
                     
-                    json_str = json.dumps(export_data, indent=2, ensure_ascii=False)
-                    st.download_button(
-                        label="💾 Export PrestaShop (validés)",
-                        data=json_str,
-                        file_name=f"prestashop_import_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                        mime="application/json"
-                    )
+                    if st.button("📦 Préparer l'export PrestaShop (validés)", key="prepare_prestashop_export"):
+                        try:
+                            published = {
+                                'signature': export_signature,
+                                'name': publish_export(build_prestashop_export(), f"prestashop_import_{stamp}", ".jsonl.gz")
+                            }
+                            st.session_state.prestashop_export = published
+                        except OSError as e:
+                            st.error(f"❌ Écriture de l'export impossible : {e}")
+                    
+                    # Fichier servi directement par /app/static, sans transiter par la session
+                    if (published and published['signature'] == export_signature
+                            and os.path.exists(os.path.join(EXPORT_DIR, published['name']))):
+                        st.link_button(
+                            "💾 Export PrestaShop (validés)",
+                            f"app/static/exports/{published['name']}"
+                        )
                 else:
                     st.info("Aucun élément validé à exporter")
     
@@ -716,42 +1121,11 @@ if st.session_state.authenticated:
         st.info("👈 Configurez les options et lancez la réécriture depuis le menu latéral")
         
         # Guide d'utilisation
-        with st.expander("📖 Guide d'utilisation"):
-            st.markdown("""
-            ### Comment utiliser l'application :
-            
-            1. **Connexion** : Entrez le mot de passe dans le menu latéral
-            2. **Sélection** : 
-               - **Par nombre** : Traite les X premiers éléments
-               - **Par IDs** : Traite des IDs spécifiques (ex: 424,425 ou 424-430)
-            3. **Lancement** : Cliquez sur "Lancer la réécriture"
-            4. **Validation** : Examinez les résultats et validez les éléments conformes
-            5. **Export** : Téléchargez les données validées pour PrestaShop
-            
-            ### Formats d'IDs acceptés :
-            - IDs individuels : `424,425,426`
-            - Plages d'IDs : `424-430`
-            - Combinaison : `424-430,435,440-445`
-            
-            ### Conformité FIVAPE :
-            - Suppression automatique des termes promotionnels
-            - Conservation des informations techniques uniquement
-            - Optimisation SEO avec mots-clés neutres
-            """)
+        render_guide()
 
 else:
     # Non authentifié
     st.info("🔐 Veuillez vous connecter dans le menu latéral pour accéder à l'application")
 
 # Footer
-st.markdown("---")
-st.markdown(
-    """
-    <div style='text-align: center; color: #888;'>
-        SEO Rewriter v1.0 - Le Vapoteur Discount | 
-        Conformité FIVAPE | 
-        Optimisation SEO
-    </div>
-    """,
-    unsafe_allow_html=True
-)
\ No newline at end of file
+render_footer()
\ No newline at end of file